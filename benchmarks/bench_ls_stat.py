@@ -0,0 +1,48 @@
+"""Benchmark ls -l with slow stat (like NFS/FUSE): serial vs thread pool
+
+Run: python -m benchmarks.bench_ls_stat > /dev/null
+Results are printed to stderr.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src.class_commands.ls_com import LsCommand
+
+FILES = 500
+STAT_DELAY = 0.002
+JOBS = 16
+
+original_stat = LsCommand._stat
+
+
+def slow_stat(entry):
+    """Stat with injected network round trip"""
+    time.sleep(STAT_DELAY)
+    return original_stat(entry)
+
+
+def run(path: str, jobs: int) -> float:
+    start = time.perf_counter()
+    LsCommand().ls(path, detailed=True, jobs=jobs)
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(FILES):
+            (Path(tmp) / f"file{i:05}.txt").write_text("x" * i)
+        with patch.object(LsCommand, "_stat", staticmethod(slow_stat)):
+            serial = run(tmp, 1)
+            pooled = run(tmp, JOBS)
+    sys.stdout.flush()
+    print(f"{FILES} entries, {STAT_DELAY * 1000:.0f} ms per stat", file=sys.stderr)
+    print(f"ls -l:        {serial:.3f}s", file=sys.stderr)
+    print(f"ls -l -j {JOBS}:  {pooled:.3f}s", file=sys.stderr)
+    print(f"speedup: {serial / pooled:.1f}x", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark grep output to file: per-fragment typer.echo vs OutputBuffer
+
+Run: python -m benchmarks.bench_output > /dev/null
+Results are printed to stderr.
+"""
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import typer
+
+from src.class_commands.grep_com import GrepCommand
+
+LINES = 200_000
+
+
+def old_print(file_path: Path, lines, regex: re.Pattern):
+    """Output like grep before OutputBuffer"""
+    for line_num, line in lines:
+        typer.echo(f"{file_path}:{line_num}:", nl=False)
+        last_end = 0
+        for match in regex.finditer(line):
+            if match.start() > last_end:
+                typer.echo(line[last_end:match.start()], nl=False)
+            typer.secho(match.group(0), fg=typer.colors.RED, bold=True, nl=False)
+            last_end = match.end()
+        if last_end < len(line):
+            typer.echo(line[last_end:])
+        else:
+            typer.echo()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = Path(tmp) / "log.txt"
+        file_path.write_text("".join(f"request {i} needle status ok\n" for i in range(LINES)))
+        regex = re.compile("needle")
+        lines = [(i, f"request {i - 1} needle status ok") for i in range(1, LINES + 1)]
+
+        start = time.perf_counter()
+        old_print(file_path, lines, regex)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        GrepCommand().grep("needle", [str(file_path)], line_number=True)
+        new_time = time.perf_counter() - start
+
+    sys.stdout.flush()
+    print(f"{LINES} matched lines", file=sys.stderr)
+    print(f"typer.echo per fragment: {old_time:.3f}s ({LINES / old_time:,.0f} lines/s)", file=sys.stderr)
+    print(f"OutputBuffer grep:       {new_time:.3f}s ({LINES / new_time:,.0f} lines/s)", file=sys.stderr)
+    print(f"speedup: {old_time / new_time:.1f}x", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
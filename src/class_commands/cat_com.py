@@ -1,14 +1,19 @@
 import os
-import typer
+import sys
 from pathlib import Path
-from src.logging.logger import command_logger
+from typing import Optional
+from src.logging.logger import add_counters, command_logger
+from src.utils.output import copy_to_output, skip_input
 
 class CatCommand:
     """Class for cat command"""
 
     @command_logger
-    def cat(self, files: list[str]):
+    def cat(self, files: list[str], byte_range: Optional[str] = None):
         """Concatenate FILE(s) to standard output."""
+        offset, length = self._parse_range(byte_range) if byte_range else (0, None)
+        sys.stdout.flush()
+        output = sys.stdout.buffer
         for file in files:
             file_path = Path(file)
 
@@ -18,6 +23,22 @@ class CatCommand:
                 raise IsADirectoryError(f"cat: {file}: Is a directory")
             if not os.access(file_path, os.R_OK):
                 raise PermissionError(f"cat: {file}: Permission denied")
-            with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    typer.echo(content)
+            with open(file_path, 'rb') as f:
+                if offset:
+                    skip_input(f, offset)
+                copied = copy_to_output(f, output, length)
+            add_counters(files=1, bytes=copied)
+        output.flush()
+
+    @staticmethod
+    def _parse_range(byte_range: str) -> tuple[int, Optional[int]]:
+        """OFFSET:LEN or OFFSET: (to the end of file)"""
+        offset_str, sep, length_str = byte_range.partition(':')
+        try:
+            offset = int(offset_str)
+            length = int(length_str) if length_str else None
+        except ValueError:
+            offset, length = -1, None
+        if not sep or offset < 0 or (length is not None and length < 0):
+            raise ValueError(f"cat: invalid range '{byte_range}', expected OFFSET:LEN")
+        return offset, length
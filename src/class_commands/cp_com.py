@@ -1,15 +1,31 @@
 import os
-import shutil
+import typer
 from pathlib import Path
 from typing import List
-from src.logging.logger import command_logger
+from src.logging.logger import add_counters, command_logger
+from src.utils.copy_engine import CopyEngine
 
 class CpCommand:
     """Class for cp command"""
 
     @command_logger
-    def cp(self, sources: List[str], destination: str, recursive: bool = False):
+    def cp(self, sources: List[str], destination: str, recursive: bool = False, jobs: int = 1,
+           update: bool = False, checksum: bool = False):
         """Copy SOURCE to DEST, or multiple SOURCE(s) to DIRECTORY."""
+        if jobs < 1:
+            raise ValueError(f"cp: invalid number of jobs '{jobs}'")
+        self.engine = CopyEngine(jobs, update=update or checksum, checksum=checksum)
+        try:
+            self._copy_sources(sources, destination, recursive)
+        finally:
+            add_counters(files=self.engine.files_copied, bytes=self.engine.bytes_copied)
+        if self.engine.update:
+            engine = self.engine
+            typer.echo(f"copied {engine.files_copied} files ({engine.bytes_copied} bytes), "
+                       f"skipped {engine.files_skipped} unchanged ({engine.bytes_skipped} bytes)")
+
+    def _copy_sources(self, sources: List[str], destination: str, recursive: bool):
+        """Copy each source to destination"""
 
         dest_path = Path(destination)
         source_paths = [Path(src) for src in sources]
@@ -38,10 +54,10 @@ class CpCommand:
         if destination.is_relative_to(source):
             raise ValueError("cp: cannot copy a directory into itself")
         if source.is_file():
-            shutil.copy2(source, destination)
+            self.engine.copy_one(source, destination)
         elif source.is_dir():
             if recursive:
-                shutil.copytree(source, destination)
+                self.engine.copy_tree(source, destination)
             else:
                 raise ValueError(f"cp: -r not specified; omitting directory '{source}'")
 
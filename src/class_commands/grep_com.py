@@ -1,87 +1,217 @@
 import re
 import typer
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from src.logging.logger import command_logger
+from typing import Iterator, Optional
+from src.logging.logger import add_counters, command_logger
+from src.utils.byte_search import ByteSearcher
+from src.utils.output import OutputBuffer
+from src.utils.trigram_index import INDEX_NAME, TrigramIndex
+from src.utils.walker import TreeWalker
+
+BATCH_SIZE = 32
+Matches = list[tuple[int, Optional[str]]]
+BatchResult = tuple[int, int, list[tuple[str, Matches, Optional[str]]]]
+
+def _search_batch(files: list[str], pattern: str, flags: int, binary_files: str) -> BatchResult:
+    """Search files of one batch in worker process, return (files, bytes, results)"""
+    searcher = ByteSearcher(re.compile(pattern, flags))
+    results: list[tuple[str, Matches, Optional[str]]] = []
+    for file in files:
+        try:
+            results.append((file, list(searcher.search(file, binary_files)), None))
+        except PermissionError:
+            results.append((file, [], "Permission denied"))
+        except Exception as e:
+            results.append((file, [], str(e)))
+    return searcher.files, searcher.bytes, results
 
 class GrepCommand:
     """Class for grep command"""
 
     @command_logger
     def grep(self, pattern: str, paths: list[str], recursive: bool = False,
-             ignore_case: bool = False, line_number: bool = False):
+             ignore_case: bool = False, line_number: bool = False, jobs: int = 1,
+             binary_files: str = 'binary', indexed: bool = False,
+             include: Optional[list[str]] = None, exclude: Optional[list[str]] = None,
+             max_depth: Optional[int] = None, ignore_files: Optional[list[str]] = None):
         """Search patterns in files"""
         flags = re.IGNORECASE if ignore_case else 0
         try:
             regex = re.compile(pattern, flags)
         except re.error as e:
             raise ValueError(f"grep: invalid pattern '{pattern}': {str(e)}")
+        if jobs < 1:
+            raise ValueError(f"grep: invalid number of jobs '{jobs}'")
+        if binary_files not in ('binary', 'text', 'without-match'):
+            raise ValueError(f"grep: invalid argument '{binary_files}' for --binary-files")
+        self.binary_files = binary_files
+        self.indexed = indexed
+        self.searcher = ByteSearcher(regex)
+        self.walker = TreeWalker(max_depth=max_depth, include=include or (), exclude=exclude or (),
+                                 ignore_files=ignore_files or (), onerror=self._walk_error)
+        try:
+            with OutputBuffer() as self.out:
+                if jobs > 1:
+                    self._search_parallel(paths, regex, line_number, recursive, jobs)
+                else:
+                    self._search_serial(paths, regex, line_number, recursive)
+        finally:
+            add_counters(files=self.searcher.files, bytes=self.searcher.bytes)
+
+    def _search_serial(self, paths: list[str], regex: re.Pattern, line_number: bool, recursive: bool):
+        """Search files one by one"""
         found_matches = False
         for path_str in paths:
             path = Path(path_str)
             if not path.exists():
-                typer.echo(f"grep: {path}: No such file or directory")
+                self.out.line(f"grep: {path}: No such file or directory")
                 continue
             if path.is_file():
                 try:
                     if self._search_in_file(path, regex, line_number):
                         found_matches = True
                 except PermissionError:
-                    typer.echo(f"grep: {path}: Permission denied")
+                    self.out.line(f"grep: {path}: Permission denied")
                 except Exception as e:
-                    typer.echo(f"grep: {path}: {str(e)}")
+                    self.out.line(f"grep: {path}: {str(e)}")
             elif path.is_dir():
                 if recursive:
-                    try:
-                        if self._search_in_directory(path, regex, line_number):
-                            found_matches = True
-                    except PermissionError:
-                        typer.echo(f"grep: {path}: Permission denied")
+                    if self._search_in_directory(path, regex, line_number):
+                        found_matches = True
                 else:
-                    typer.echo(f"grep: {path}: Is a directory")
+                    self.out.line(f"grep: {path}: Is a directory")
 
         if not found_matches:
             pass
 
     def _search_in_file(self, file_path: Path, regex: re.Pattern, show_line_number: bool):
         """Search for pattern in file"""
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            for line_num, line in enumerate(file, 1):
-                line = line.rstrip('\n\r')
-                if regex.search(line):
-                    if show_line_number:
-                        typer.echo(f"{file_path}:{line_num}:", nl=False)
-                    else:
-                        typer.echo(f"{file_path}:", nl=False)
-
-                    self._print_line(line, regex)
+        for line_num, line in self.searcher.search(file_path, self.binary_files):
+            self._print_match(file_path, line_num, line, regex, show_line_number)
 
     def _search_in_directory(self, dir_path: Path, regex: re.Pattern, show_line_number: bool) -> bool:
         """Recursion search in dirs"""
         found = False
-        try:
-            for item in dir_path.iterdir():
-                if item.is_file():
-                    try:
-                        if self._search_in_file(item, regex, show_line_number):
-                            found = True
-                    except PermissionError:
-                        typer.echo(f"grep: {item}: Permission denied")
-                elif item.is_dir():
-                    if self._search_in_directory(item, regex, show_line_number):
-                        found = True
-        except PermissionError:
-            raise PermissionError(f"grep: {dir_path}: Permission denied")
+        for item in self._iter_directory(dir_path):
+            try:
+                self._search_in_file(item, regex, show_line_number)
+            except PermissionError:
+                self.out.line(f"grep: {item}: Permission denied")
+            except OSError as e:
+                self.out.line(f"grep: {item}: {str(e)}")
+        return found
+
+    def _iter_files(self, paths: list[str], recursive: bool) -> Iterator[Path]:
+        """Yield files to search in the same order as serial search"""
+        for path_str in paths:
+            path = Path(path_str)
+            if not path.exists():
+                self.out.line(f"grep: {path}: No such file or directory")
+            elif path.is_file():
+                yield path
+            elif path.is_dir():
+                if recursive:
+                    yield from self._iter_directory(path)
+                else:
+                    self.out.line(f"grep: {path}: Is a directory")
+
+    def _indexed_files(self, dir_path: Path, files: Iterator[Path]) -> Optional[list[Path]]:
+        """Candidates among files from trigram index (None to search all files)"""
+        if not self.indexed:
+            return None
+        index = TrigramIndex(dir_path)
+        if not index.exists():
+            self.out.line(f"grep: {dir_path}: no index, run grep-index first")
+            return None
+        return index.candidates(self.searcher.literal, files)
+
+    @command_logger
+    def build_index(self, path: str, refresh: bool = False):
+        """Build or refresh trigram index for dir"""
+        dir_path = Path(path)
+        if not dir_path.exists():
+            raise FileNotFoundError(f"grep-index: {path}: No such file or directory")
+        if not dir_path.is_dir():
+            raise NotADirectoryError(f"grep-index: {path}: Not a directory")
+        total, updated, removed = TrigramIndex(dir_path).update(rebuild=not refresh)
+        typer.echo(f"Indexed {total} files ({updated} updated, {removed} removed)")
+
+    def _iter_directory(self, dir_path: Path) -> Iterator[Path]:
+        """Recursion walk for dirs"""
+        files = (Path(entry.path) for entry in self.walker.walk(dir_path)
+                 if entry.is_file() and entry.name != INDEX_NAME)
+        candidates = self._indexed_files(dir_path, files)
+        yield from files if candidates is None else candidates
+
+    def _walk_error(self, error: OSError):
+        """Report unreadable dir"""
+        self.out.line(f"grep: {error.filename}: {error.strerror}")
+
+    def _iter_batches(self, paths: list[str], recursive: bool) -> Iterator[list[str]]:
+        """Group files to batches for workers"""
+        batch = []
+        for file_path in self._iter_files(paths, recursive):
+            batch.append(str(file_path))
+            if len(batch) >= BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _search_parallel(self, paths: list[str], regex: re.Pattern, show_line_number: bool,
+                         recursive: bool, jobs: int) -> bool:
+        """Search files in process pool, print results in input order"""
+        found = False
+        pending: deque[Future[BatchResult]] = deque()
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for batch in self._iter_batches(paths, recursive):
+                pending.append(executor.submit(_search_batch, batch, regex.pattern, regex.flags,
+                                               self.binary_files))
+                if len(pending) >= jobs * 4:
+                    found |= self._print_batch(pending.popleft().result(), regex, show_line_number)
+            while pending:
+                found |= self._print_batch(pending.popleft().result(), regex, show_line_number)
+        return found
+
+    def _print_batch(self, batch: BatchResult, regex: re.Pattern, show_line_number: bool) -> bool:
+        """Print results of one batch, add its counts to searcher"""
+        files, size, results = batch
+        self.searcher.files += files
+        self.searcher.bytes += size
+        found = False
+        for file, matches, error in results:
+            if error:
+                self.out.line(f"grep: {file}: {error}")
+                continue
+            for line_num, line in matches:
+                self._print_match(Path(file), line_num, line, regex, show_line_number)
+                found = True
         return found
 
+    def _print_match(self, file_path: Path, line_num: int, line: Optional[str], regex: re.Pattern,
+                     show_line_number: bool):
+        """Print file name, line number and line"""
+        if line is None:
+            self.out.line(f"Binary file {file_path} matches")
+            return
+        if show_line_number:
+            self.out.write(f"{file_path}:{line_num}:")
+        else:
+            self.out.write(f"{file_path}:")
+        self._print_line(line, regex)
+
     def _print_line(self, line: str, regex: re.Pattern):
         """Print finded line"""
+        if not self.out.color:
+            self.out.line(line)
+            return
         last_end = 0
+        parts = []
         for match in regex.finditer(line):
-            if match.start() > last_end:
-                typer.echo(line[last_end:match.start()], nl=False)
-            typer.secho(match.group(0), fg=typer.colors.RED, bold=True, nl=False)
+            parts.append(line[last_end:match.start()])
+            parts.append(self.out.style(match.group(0), fg=typer.colors.RED, bold=True))
             last_end = match.end()
-        if last_end < len(line):
-            typer.echo(line[last_end:])
-        else:
-            typer.echo()
+        parts.append(line[last_end:])
+        self.out.line("".join(parts))
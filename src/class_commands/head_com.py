@@ -0,0 +1,47 @@
+import os
+import sys
+from pathlib import Path
+from typing import BinaryIO
+from src.logging.logger import command_logger
+
+BLOCK_SIZE = 1 << 16
+
+class HeadCommand:
+    """Class for head command"""
+
+    @command_logger
+    def head(self, files: list[str], lines: int = 10):
+        """Print first LINES lines of FILE(s)"""
+        if lines < 0:
+            raise ValueError(f"head: invalid number of lines: '{lines}'")
+        sys.stdout.flush()
+        output = sys.stdout.buffer
+        for number, file in enumerate(files):
+            file_path = Path(file)
+            if not file_path.exists():
+                raise FileNotFoundError(f"head: {file}: No such file or directory")
+            if file_path.is_dir():
+                raise IsADirectoryError(f"head: {file}: Is a directory")
+            if not os.access(file_path, os.R_OK):
+                raise PermissionError(f"head: {file}: Permission denied")
+            if len(files) > 1:
+                separator = "\n" if number else ""
+                output.write(f"{separator}==> {file} <==\n".encode())
+            with open(file_path, 'rb') as f:
+                self._copy_lines(f, output, lines)
+        output.flush()
+
+    @staticmethod
+    def _copy_lines(file: BinaryIO, output: BinaryIO, lines: int):
+        """Write blocks up to LINES-th newline as they are scanned, no rewind (works on pipes)"""
+        count = 0
+        while lines and (block := file.read(BLOCK_SIZE)):
+            found = block.count(b'\n')
+            if count + found >= lines:
+                index = -1
+                for _ in range(lines - count):
+                    index = block.index(b'\n', index + 1)
+                output.write(block[:index + 1])
+                return
+            output.write(block)
+            count += found
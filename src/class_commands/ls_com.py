@@ -1,14 +1,29 @@
+import os
 import stat
 import time
 import typer
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Optional
-from src.logging.logger import command_logger
+from typing import Iterator, Optional
+from src.logging.logger import add_counters, command_logger
+from src.utils.output import OutputBuffer
+
+UNSORTED_SIZE_WIDTH = 10
+STAT_CHUNK = 256
+SORT_KEYS = {
+    "name": lambda item: item[0].name,
+    "size": lambda item: (-item[1].st_size, item[0].name),
+    "time": lambda item: (-item[1].st_mtime, item[0].name),
+    "none": None,
+}
 
 class LsCommand:
     """Class for ls command"""
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _format_file_mode(st_mode: int) -> str:
         """Formate permisions to '-rwxr-xr-x'"""
         file_type = 'd' if stat.S_ISDIR(st_mode) else '-'
@@ -26,10 +41,11 @@ class LsCommand:
         return file_type + ''.join(permissions)
 
     @staticmethod
-    def _format_time(timestamp: float) -> str:
+    def _format_time(timestamp: float, current_time: Optional[time.struct_time] = None) -> str:
         """Formate like bash ls -l"""
         file_time = time.localtime(timestamp)
-        current_time = time.localtime()
+        if current_time is None:
+            current_time = time.localtime()
 
         if (current_time.tm_year - file_time.tm_year > 0 or
             current_time.tm_mon - file_time.tm_mon > 6):
@@ -38,7 +54,8 @@ class LsCommand:
             return time.strftime("%b %d %H:%M", file_time)
 
     @command_logger
-    def ls(self, path: Optional[str] = None, detailed: bool = False):
+    def ls(self, path: Optional[str] = None, detailed: bool = False, recursive: bool = False,
+           all_files: bool = False, sort: str = "name", jobs: int = 1):
         """List information about the FILEs (the current directory by default)."""
         target_path = Path(path) if path else Path.cwd()
 
@@ -47,39 +64,136 @@ class LsCommand:
         if not target_path.is_dir():
             typer.echo(path)
             return
+        if sort not in SORT_KEYS:
+            raise ValueError(f"ls: invalid sort '{sort}'")
+        if jobs < 1:
+            raise ValueError(f"ls: invalid number of jobs '{jobs}'")
+
+        self.detailed = detailed
+        self.all_files = all_files
+        self.sort = sort
+        self.now = time.localtime()
+        self.time_cache: dict[int, str] = {}
+        self.executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        try:
+            self._list_tree(target_path, recursive)
+        finally:
+            if self.executor:
+                self.executor.shutdown()
+
+    def _list_tree(self, target_path: Path, recursive: bool):
+        """Print dir and its subdirs for -R"""
+        with OutputBuffer() as out:
+            pending = [target_path]
+            first = True
+            while pending:
+                dir_path = pending.pop()
+                if recursive:
+                    if not first:
+                        out.line()
+                    out.line(f"{dir_path}:")
+                first = False
+                try:
+                    subdirs = self._list_dir(dir_path, out, recursive)
+                except PermissionError as e:
+                    if dir_path == target_path:
+                        raise
+                    out.line(str(e))
+                    continue
+                pending.extend(reversed(subdirs))
+
+    def _scan(self, dir_path: Path) -> Iterator[os.DirEntry]:
+        """Entries of dir without hidden unless -a"""
+        try:
+            with os.scandir(dir_path) as iterator:
+                for entry in iterator:
+                    if self.all_files or not entry.name.startswith('.'):
+                        yield entry
+        except PermissionError:
+            raise PermissionError(f"ls: cannot open directory '{dir_path}': Permission denied")
+
+    def _list_dir(self, dir_path: Path, out: OutputBuffer, recursive: bool) -> list[Path]:
+        """Print one dir, return subdirs for -R"""
+        subdirs = []
+        if self.sort == "none":
+            entries = self._scan(dir_path)
+            while chunk := list(islice(entries, STAT_CHUNK)):
+                for entry, stat_info in self._with_stats(chunk, self.detailed):
+                    out.line(self._format_entry(entry, stat_info, UNSORTED_SIZE_WIDTH))
+                    if recursive and self._is_real_dir(entry, stat_info):
+                        subdirs.append(Path(entry.path))
+            return subdirs
+
+        need_stat = self.detailed or self.sort in ("size", "time")
+        items = self._with_stats(list(self._scan(dir_path)), need_stat)
+        items.sort(key=SORT_KEYS[self.sort])
 
-        items = list(target_path.iterdir())
-
-        if not detailed:
-            for item in items:
-                name = item.name
-                if item.is_dir():
-                    name += "/"
-                typer.echo(name)
-            return
-
-        file_stats = []
         max_size_len = 0
+        if self.detailed:
+            max_size_len = max((len(str(stat_info.st_size)) for _, stat_info in items), default=0)
+        for entry, stat_info in items:
+            out.line(self._format_entry(entry, stat_info if self.detailed else None, max_size_len))
+            if recursive and self._is_real_dir(entry, stat_info):
+                subdirs.append(Path(entry.path))
+        return subdirs
+
+    def _with_stats(self, entries: list[os.DirEntry], need_stat: bool) -> list:
+        """Pair entries with stat results, in thread pool if -j"""
+        if not need_stat:
+            add_counters(files=len(entries))
+            return [(entry, None) for entry in entries]
+        add_counters(files=len(entries), stat_calls=len(entries))
+        if self.executor:
+            stats = self.executor.map(self._stat, entries)
+        else:
+            stats = map(self._stat, entries)
+        return [(entry, stat_info) for entry, stat_info in zip(entries, stats)
+                if stat_info is not None]
 
-        for item in items:
-            try:
-                stat_info = item.stat()
-
-                max_size_len = max(max_size_len, len(str(stat_info.st_size)))
-
-                file_stats.append((item, stat_info))
-            except OSError:
-                continue
-
-
-        for item, stat_info in file_stats:
-            permissions = self._format_file_mode(stat_info.st_mode)
-            size_str = f"{stat_info.st_size:>{max_size_len}}"
-            time_str = self._format_time(stat_info.st_mtime)
-            name = item.name
-
-            if item.is_dir():
-                name += "/"
+    @staticmethod
+    def _stat(entry: os.DirEntry) -> Optional[os.stat_result]:
+        """Stat entry once (None if it disappeared)"""
+        try:
+            return entry.stat()
+        except OSError:
+            return None
 
-            line = f"{permissions} {size_str} {time_str} {name}"
-            typer.echo(line)
+    @staticmethod
+    def _is_dir(entry: os.DirEntry, stat_info: Optional[os.stat_result]) -> bool:
+        """Dir check without extra stat"""
+        if stat_info is not None:
+            return stat.S_ISDIR(stat_info.st_mode)
+        try:
+            return entry.is_dir()
+        except OSError:
+            return False
+
+    @classmethod
+    def _is_real_dir(cls, entry: os.DirEntry, stat_info: Optional[os.stat_result]) -> bool:
+        """Dir to descend into for -R, symlinks to dirs are not followed (like GNU ls)"""
+        try:
+            return cls._is_dir(entry, stat_info) and not entry.is_symlink()
+        except OSError:
+            return False
+
+    def _format_entry(self, entry: os.DirEntry, stat_info: Optional[os.stat_result],
+                      size_width: int) -> str:
+        """Name or long format line"""
+        name = entry.name
+        if self._is_dir(entry, stat_info):
+            name += "/"
+        if stat_info is None:
+            return name
+        permissions = self._format_file_mode(stat_info.st_mode)
+        size_str = f"{stat_info.st_size:>{size_width}}"
+        time_str = self._format_mtime(stat_info.st_mtime)
+        return f"{permissions} {size_str} {time_str} {name}"
+
+    def _format_mtime(self, timestamp: float) -> str:
+        """Formated time cached by minute"""
+        minute = int(timestamp // 60)
+        time_str = self.time_cache.get(minute)
+        if time_str is None:
+            time_str = self._format_time(timestamp, self.now)
+            self.time_cache[minute] = time_str
+        return time_str
@@ -1,22 +1,39 @@
+import errno
 import os
 import shutil
+import uuid
 from pathlib import Path
-from src.logging.logger import command_logger
+from typing import List
+from src.logging.logger import add_counters, command_logger
+from src.utils.copy_engine import CopyEngine, copy_file
 
 class MvCommand:
     """Class for mv command"""
 
     @command_logger
-    def mv(self, source: str, destination: str):
-        """Move or rename file/dir"""
+    def mv(self, sources: List[str], destination: str, jobs: int = 1):
+        """Move or rename SOURCE to DEST, or multiple SOURCE(s) to DIRECTORY."""
+        if isinstance(sources, str):
+            sources = [sources]
+        if jobs < 1:
+            raise ValueError(f"mv: invalid number of jobs '{jobs}'")
+        self.jobs = jobs
+        dest_path = Path(destination)
+        to_directory = dest_path.exists() and dest_path.is_dir()
+        if len(sources) > 1 and not to_directory:
+            raise ValueError(f"mv: target '{destination}' is not a directory")
+        for source in sources:
+            self._move_item(source, dest_path, to_directory)
+            add_counters(files=1)
 
+    def _move_item(self, source: str, dest_path: Path, to_directory: bool):
+        """Move one file/dir"""
         source_path = Path(source)
-        dest_path = Path(destination)
         if not source_path.exists():
             raise FileNotFoundError(f"mv: {source}: No such file or directory")
         if not self._can_read(source_path):
             raise PermissionError(f"mv: {source}: Permission denied")
-        if dest_path.exists() and dest_path.is_dir():
+        if to_directory:
             final_dest = dest_path / source_path.name
         else:
             final_dest = dest_path
@@ -29,9 +46,39 @@ class MvCommand:
         if final_dest.is_relative_to(source_path):
             raise ValueError("mv: cannot move a directory into itself")
         try:
-            shutil.move(str(source_path), str(final_dest))
-        except Exception as e:
-            raise OSError(f"mv: failed to move '{source}' to '{destination}': {str(e)}")
+            os.rename(source_path, final_dest)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise OSError(f"mv: failed to move '{source}' to '{final_dest}': {str(e)}")
+            self._move_across_devices(source_path, final_dest)
+
+    def _move_across_devices(self, source_path: Path, final_dest: Path):
+        """Copy to staging name, rename into place, then delete source"""
+        staging = final_dest.parent / f".{final_dest.name}.mv-{uuid.uuid4().hex[:8]}"
+        try:
+            if source_path.is_symlink():
+                os.symlink(os.readlink(source_path), staging)
+            elif source_path.is_dir():
+                CopyEngine(self.jobs, symlinks=True).copy_tree(source_path, staging)
+            else:
+                copy_file(source_path, staging)
+            os.replace(staging, final_dest)
+        except BaseException as e:
+            self._remove(staging)
+            if isinstance(e, Exception):
+                raise OSError(f"mv: failed to move '{source_path}' to '{final_dest}': {str(e)}")
+            raise
+        try:
+            self._remove(source_path, missing_ok=False)
+        except OSError as e:
+            raise OSError(f"mv: cannot remove '{source_path}' after copy: {str(e)}")
+
+    def _remove(self, path: Path, missing_ok: bool = True):
+        """Delete file, link or dir"""
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path, ignore_errors=missing_ok)
+        else:
+            path.unlink(missing_ok=missing_ok)
 
     def _can_read(self, path: Path) -> bool:
         """Chek for read"""
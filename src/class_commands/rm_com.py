@@ -1,20 +1,53 @@
 import os
 import shutil
+import sys
 import typer
 from pathlib import Path
-from src.logging.logger import command_logger
+from typing import List, Optional
+from src.logging.logger import add_counters, command_logger
+from src.utils.remove import ParallelRemover
+from src.utils.trash import TRASH_NAME, home_trash, move_to_trash, purge_trash, restore_from_trash
 
 class RmCommand:
     """Class for rm command"""
 
     @command_logger
-    def rm(self, path: str, recursive: bool = False):
+    def rm(self, paths: Optional[List[str]] = None, recursive: bool = False, use_trash: bool = False,
+           purge: bool = False, restore: bool = False, jobs: int = 4, force: bool = False,
+           from_file: Optional[str] = None):
         """Delete file/dir"""
+        if isinstance(paths, str):
+            paths = [paths]
+        paths = list(paths or [])
+        if from_file:
+            paths.extend(self._read_paths(from_file))
+        if purge:
+            purged = purge_trash(Path(paths[0]) if paths else Path.cwd(), jobs)
+            typer.echo(f"Purged {purged} items from trash")
+            return
+        if not paths:
+            raise ValueError("rm: missing operand")
+        if restore:
+            for path in paths:
+                if restore_from_trash(Path(path)) is None:
+                    raise FileNotFoundError(f"rm: {path}: not found in trash")
+                typer.echo(f"Restored '{path}'")
+            return
+        if force:
+            self._remove_force(paths, recursive, use_trash, jobs)
+            return
+        for path in paths:
+            self._remove_path(path, recursive, use_trash)
 
+    def _remove_path(self, path: str, recursive: bool, use_trash: bool):
+        """Delete one file/dir with confirmation"""
         target_path = Path(path)
         if not target_path.exists():
             raise FileNotFoundError(f"rm: {path}: No such file or directory")
         self._check_protected_paths(target_path)
+        if use_trash:
+            self._move_to_trash(target_path, recursive)
+            return
         if target_path.is_file():
             self._remove_file(target_path)
         elif target_path.is_dir():
@@ -22,6 +55,41 @@ class RmCommand:
         else:
             raise ValueError(f"rm: {path}: Invalid file type")
 
+    def _read_paths(self, from_file: str) -> List[str]:
+        """Paths from file ('-' for stdin), one per line or NUL-separated"""
+        if from_file == "-":
+            data = sys.stdin.buffer.read()
+        else:
+            try:
+                data = Path(from_file).read_bytes()
+            except FileNotFoundError:
+                raise FileNotFoundError(f"rm: {from_file}: No such file or directory")
+        items = data.split(b"\0") if b"\0" in data else data.splitlines()
+        return [os.fsdecode(item) for item in items if item]
+
+    def _remove_force(self, paths: List[str], recursive: bool, use_trash: bool, jobs: int):
+        """Delete without confirmation on worker pool"""
+        targets = []
+        for path in paths:
+            target_path = Path(path)
+            if not target_path.exists() and not target_path.is_symlink():
+                continue
+            self._check_protected_paths(target_path)
+            if target_path.is_dir() and not target_path.is_symlink() and not recursive:
+                typer.echo(f"rm: cannot remove '{path}': Is a directory")
+                continue
+            targets.append(target_path)
+        if use_trash:
+            for target_path in targets:
+                self._move_to_trash(target_path, recursive)
+            return
+        remover = ParallelRemover(jobs)
+        remover.remove(targets)
+        add_counters(files=remover.files, bytes=remover.bytes)
+        for failed_path, error in remover.errors:
+            typer.echo(f"rm: cannot remove '{failed_path}': {error.strerror or error}")
+        typer.echo(f"Removed {remover.files} files ({remover.bytes} bytes)")
+
     def _check_protected_paths(self, path: Path):
         """Chek for '/' or '..'"""
         absolute_path = path.resolve()
@@ -30,6 +98,19 @@ class RmCommand:
         if absolute_path == Path('..').resolve():
             raise PermissionError("rm: cannot remove parent directory '..'")
 
+    def _move_to_trash(self, path: Path, recursive: bool):
+        """Rename file/dir to trash of its filesystem"""
+        if path.is_dir() and not recursive:
+            raise ValueError(f"rm: {path}: is a directory (use -r to remove recursively)")
+        if TRASH_NAME in path.absolute().parts or path.absolute().is_relative_to(home_trash()):
+            raise ValueError(f"rm: {path}: is in trash, use --purge")
+        if not self._can_write(path.parent):
+            raise PermissionError(f"rm: cannot remove '{path}': Permission denied")
+        try:
+            move_to_trash(path)
+        except OSError as e:
+            raise OSError(f"rm: cannot move '{path}' to trash: {str(e)}")
+
     def _remove_file(self, file_path: Path):
         """Delete file"""
         if not self._can_write(file_path):
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO
+from src.logging.logger import command_logger
+from src.utils.output import copy_to_output
+
+BLOCK_SIZE = 1 << 16
+
+class TailCommand:
+    """Class for tail command"""
+
+    @command_logger
+    def tail(self, files: list[str], lines: int = 10, follow: bool = False, sleep_interval: float = 1.0):
+        """Print last LINES lines of FILE(s), with follow keep printing appended data"""
+        if lines < 0:
+            raise ValueError(f"tail: invalid number of lines: '{lines}'")
+        sys.stdout.flush()
+        output = sys.stdout.buffer
+        positions = {}
+        for number, file in enumerate(files):
+            file_path = Path(file)
+            if not file_path.exists():
+                raise FileNotFoundError(f"tail: {file}: No such file or directory")
+            if file_path.is_dir():
+                raise IsADirectoryError(f"tail: {file}: Is a directory")
+            if not os.access(file_path, os.R_OK):
+                raise PermissionError(f"tail: {file}: Permission denied")
+            if len(files) > 1:
+                separator = "\n" if number else ""
+                output.write(f"{separator}==> {file} <==\n".encode())
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if f.seekable() and size:
+                    f.seek(self._start_of_lines(f, size, lines))
+                    copy_to_output(f, output)
+                elif lines:
+                    output.writelines(deque(f, maxlen=lines))
+                if f.seekable():
+                    positions[file] = f.tell()
+        output.flush()
+        if follow:
+            self._follow(files, positions, output, sleep_interval)
+
+    @staticmethod
+    def _start_of_lines(file: BinaryIO, size: int, lines: int) -> int:
+        """Offset of last LINES lines, blocks are read backward from end of file
+
+        Only for regular files reporting a size; pipes and procfs files (st_size 0)
+        are read forward keeping the last LINES lines in a bounded deque.
+        """
+        if lines == 0:
+            return size
+        position = size
+        count = 0
+        last_block = True
+        while position > 0:
+            read_size = min(BLOCK_SIZE, position)
+            position -= read_size
+            file.seek(position)
+            block = file.read(read_size)
+            end = len(block)
+            if last_block and block.endswith(b'\n'):
+                end -= 1
+            last_block = False
+            while (index := block.rfind(b'\n', 0, end)) >= 0:
+                count += 1
+                if count == lines:
+                    return position + index + 1
+                end = index
+        return 0
+
+    def _follow(self, files: list[str], positions: dict, output: BinaryIO, sleep_interval: float):
+        """Poll files for appended data until interrupted"""
+        current = files[-1]
+        files = [file for file in files if file in positions]  # pipes can't be polled
+        try:
+            while True:
+                time.sleep(sleep_interval)
+                for file in files:
+                    try:
+                        size = os.stat(file).st_size
+                    except FileNotFoundError:
+                        continue
+                    if size < positions[file]:
+                        sys.stderr.write(f"tail: {file}: file truncated\n")
+                        positions[file] = 0
+                    if size == positions[file]:
+                        continue
+                    if len(files) > 1 and file != current:
+                        output.write(f"\n==> {file} <==\n".encode())
+                        current = file
+                    with open(file, 'rb') as f:
+                        f.seek(positions[file])
+                        copy_to_output(f, output, size - positions[file])
+                        positions[file] = f.tell()
+                    output.flush()
+        except KeyboardInterrupt:
+            pass
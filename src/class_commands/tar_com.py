@@ -1,16 +1,31 @@
 import os
+import sqlite3
+import sys
 import tarfile
 import typer
 from pathlib import Path
-from typing import Optional
-from src.logging.logger import command_logger
+from typing import BinaryIO, Optional
+from src.logging.logger import add_counters, command_logger
+from src.utils.block_compress import CODECS, LEVELS, TAR_SUFFIXES, BlockCompressor, open_decompressed
+from src.utils.output import is_stream, open_binary_output
+from src.utils.sparse import is_sparse
+from src.utils.sparse_tar import add_sparse_member
+from src.utils.tar_index import TarIndex, drop_members, member_size
+from src.utils.walker import TreeWalker
 
 class TarCommand:
     """Class for tar command"""
 
     @command_logger
-    def tar(self, folder: str, archive: str):
+    def tar(self, folder: str, archive: Optional[str], exclude: Optional[list[str]] = None, codec: str = 'gz',
+            level: Optional[int] = None, jobs: int = 1, index: bool = False):
         """Make TAR archive"""
+        if not archive:
+            raise ValueError("tar: missing archive name")
+        if codec not in CODECS:
+            raise ValueError(f"tar: invalid argument '{codec}' for --codec")
+        if level is not None and codec in LEVELS and level not in LEVELS[codec]:
+            raise ValueError(f"tar: invalid compression level {level} for {codec}")
         folder_path = Path(folder)
         archive_path = Path(archive)
         if not folder_path.exists():
@@ -19,29 +34,97 @@ class TarCommand:
             raise NotADirectoryError(f"tar: {folder}: Not a directory")
         if not os.access(folder_path, os.R_OK):
             raise PermissionError(f"tar: {folder}: Permission denied")
-        if archive_path.exists():
-            if not os.access(archive_path, os.W_OK):
-                raise PermissionError(f"tar: {archive}: Permission denied")
-            if not typer.confirm(f"Overwrite {archive}?"):
-                typer.echo("Canceled")
-                return
-        if not archive_path.name.endswith(('.tar.gz', '.tgz')):
-            archive_path = archive_path.with_suffix('.tar.gz')
+        streaming = is_stream(archive)
+        if streaming and index:
+            raise ValueError("tar: --index needs an archive file, not a stream")
+        if not streaming:
+            if archive_path.exists():
+                if not os.access(archive_path, os.W_OK):
+                    raise PermissionError(f"tar: {archive}: Permission denied")
+                if not typer.confirm(f"Overwrite {archive}?"):
+                    typer.echo("Canceled")
+                    return
+            if not archive_path.name.endswith(TAR_SUFFIXES[codec]):
+                archive_path = archive_path.with_suffix(TAR_SUFFIXES[codec][0])
         try:
-            with tarfile.open(archive_path, 'w:gz') as tar:
-                tar.add(folder_path, arcname=folder_path.name)
+            walker = TreeWalker(exclude=exclude or (), yield_dirs=True, onerror=self._walk_error)
+            rows: list[tuple[str, int, int]] = []
+            with open_binary_output(archive_path) as output, BlockCompressor(output, codec, level, jobs) as stream, \
+                    tarfile.open(fileobj=stream, mode='w|') as tar:
+                offset = tar.offset
+                tar.add(folder_path, arcname=folder_path.name, recursive=False)
+                self._record_member(tar, offset, rows)
+                for entry in walker.walk(folder_path):
+                    arcname = str(Path(folder_path.name) / Path(entry.path).relative_to(folder_path))
+                    offset = tar.offset
+                    if not (self._maybe_sparse(entry) and add_sparse_member(tar, entry.path, arcname)):
+                        tar.add(entry.path, arcname=arcname, recursive=False)
+                    self._record_member(tar, offset, rows)
+            add_counters(files=len(rows), bytes=stream.position)
+            if index:
+                TarIndex(archive_path).write(codec, stream.block_checkpoints(), rows)
         except Exception as e:
-            if archive_path.exists():
+            if not streaming and archive_path.exists():
                 archive_path.unlink()
             raise OSError(f"tar: failed to create archive: {str(e)}")
+
+    @staticmethod
+    def _walk_error(error: OSError):
+        """Unreadable dir aborts the archive instead of silently leaving it out"""
+        raise error
+
+    @staticmethod
+    def _maybe_sparse(entry: os.DirEntry) -> bool:
+        """Regular file with holes, checked on cached lstat before anything is opened"""
+        try:
+            return entry.is_file(follow_symlinks=False) and is_sparse(entry.stat(follow_symlinks=False))
+        except OSError:
+            return False
+
+    @staticmethod
+    def _record_member(tar: tarfile.TarFile, offset: int, rows: list[tuple[str, int, int]]):
+        """Remember header offset of member just added for the index, drop cached members"""
+        members = drop_members(tar)
+        if members:
+            tarinfo = members[-1]
+            name = tarinfo.pax_headers.get('GNU.sparse.name', tarinfo.name)
+            rows.append((name.rstrip('/'), offset, member_size(tarinfo)))
+
     @command_logger
-    def untar(self, archive: str, extract_path: Optional[str] = None):
-        """Распаковывает TAR.GZ архив"""
+    def list_members(self, archive: str):
+        """List TAR archive members using seek index, one streaming pass if index can't be written"""
         archive_path = Path(archive)
         if not archive_path.exists():
-            raise FileNotFoundError(f"untar: {archive}: No such file or directory")
-        if not tarfile.is_tarfile(archive_path):
-            raise ValueError(f"untar: {archive}: Not a valid TAR archive")
+            raise FileNotFoundError(f"tar: {archive}: No such file or directory")
+        try:
+            index = TarIndex(archive_path)
+            if index.ensure():
+                for name, _ in index.names():
+                    typer.echo(name)
+                return
+            with open(archive_path, 'rb') as fileobj, \
+                    tarfile.open(fileobj=open_decompressed(fileobj), mode='r|') as tar:
+                for member in tar:
+                    typer.echo(member.name.rstrip('/'))
+                    drop_members(tar)
+        except (tarfile.TarError, EOFError, sqlite3.Error) as e:
+            raise OSError(f"tar: failed to read archive: {str(e)}")
+
+    @command_logger
+    def untar(self, archive: str, extract_path: Optional[str] = None, conflict: str = 'ask',
+              members: Optional[list[str]] = None):
+        """Распаковывает TAR архив за один проход (archive '-' читается из stdin)"""
+        if conflict not in ('ask', 'overwrite', 'skip'):
+            raise ValueError(f"untar: invalid argument '{conflict}' for --conflict")
+        from_stdin = archive == '-'
+        if from_stdin and members:
+            raise ValueError("untar: --member needs an archive file, not stdin")
+        archive_path = Path(archive)
+        if not from_stdin:
+            if not archive_path.exists():
+                raise FileNotFoundError(f"untar: {archive}: No such file or directory")
+            if not tarfile.is_tarfile(archive_path):
+                raise ValueError(f"untar: {archive}: Not a valid TAR archive")
         if extract_path:
             target_path = Path(extract_path)
         else:
@@ -51,18 +134,94 @@ class TarCommand:
         if not os.access(target_path, os.W_OK):
             raise PermissionError(f"untar: {target_path}: Permission denied")
         try:
-            with tarfile.open(archive_path, "r:gz") as tar:
-                file_list = tar.getnames()
-                conflicting_files = []
-                for file in file_list:
-                    target_file = target_path / file
-                    if target_file.exists():
-                        conflicting_files.append(file)
-                if conflicting_files and not typer.confirm(
-                    f"Overwrite {len(conflicting_files)}?"
-                ):
-                    typer.echo("Cancelsed")
-                    return
-                tar.extractall(target_path)
+            if members:
+                self._extract_indexed(archive_path, members, target_path, conflict)
+            elif from_stdin:
+                self._extract_stream(sys.stdin.buffer, target_path, conflict, can_ask=False)
+            else:
+                with open(archive_path, 'rb') as fileobj:
+                    self._extract_stream(fileobj, target_path, conflict, can_ask=True)
         except Exception as e:
             raise OSError(f"untar: failed to extract archive: {str(e)}")
+
+    def _extract_stream(self, fileobj: BinaryIO, target_path: Path, conflict: str, can_ask: bool):
+        """Extract members in one forward pass, conflicts are resolved per member"""
+        directories: list[tarfile.TarInfo] = []
+        with tarfile.open(fileobj=open_decompressed(fileobj), mode='r|') as tar:
+            for member in tar:
+                self._extract_member(tar, member, target_path, conflict, can_ask, directories)
+                drop_members(tar)
+            self._set_directory_attrs(tar, directories, target_path)
+
+    def _extract_indexed(self, archive_path: Path, names: list[str], target_path: Path, conflict: str):
+        """Extract chosen members, decompression starts at checkpoint nearest to each of them"""
+        index = TarIndex(archive_path)
+        if not index.ensure():
+            self._extract_scan(archive_path, names, target_path, conflict)
+            return
+        directories: list[tarfile.TarInfo] = []
+        last_tar: Optional[tarfile.TarFile] = None
+        for name in names:
+            offsets = index.lookup(name)
+            if not offsets:
+                raise FileNotFoundError(f"{name}: Not found in archive")
+            for offset in offsets:
+                file, stream = index.open_at(offset)
+                with file, tarfile.open(fileobj=stream, mode='r|') as tar:
+                    member = tar.next()
+                    if member is None:
+                        raise EOFError(f"{archive_path}: index does not match archive")
+                    self._extract_member(tar, member, target_path, conflict, True, directories)
+                    last_tar = tar
+        if last_tar is not None:
+            self._set_directory_attrs(last_tar, directories, target_path)
+
+    def _extract_scan(self, archive_path: Path, names: list[str], target_path: Path, conflict: str):
+        """Extract chosen members in one forward pass, used when index can't be written"""
+        wanted = {name.rstrip('/') for name in names}
+        found = set()
+        directories: list[tarfile.TarInfo] = []
+        with open(archive_path, 'rb') as fileobj, \
+                tarfile.open(fileobj=open_decompressed(fileobj), mode='r|') as tar:
+            for member in tar:
+                name = member.name.rstrip('/')
+                matched = {want for want in wanted if name == want or name.startswith(want + '/')}
+                if matched:
+                    found |= matched
+                    self._extract_member(tar, member, target_path, conflict, True, directories)
+                drop_members(tar)
+            self._set_directory_attrs(tar, directories, target_path)
+        for name in names:
+            if name.rstrip('/') not in found:
+                raise FileNotFoundError(f"{name}: Not found in archive")
+
+    def _extract_member(self, tar: tarfile.TarFile, member: tarfile.TarInfo, target_path: Path, conflict: str,
+                        can_ask: bool, directories: list[tarfile.TarInfo]):
+        """Extract one member unless it conflicts with existing file and user keeps it"""
+        data_filter = getattr(tarfile, 'data_filter', None)
+        if data_filter:
+            member = data_filter(member, str(target_path))
+        destination = target_path / member.name
+        if not member.isdir() and os.path.lexists(destination):
+            if conflict == 'skip':
+                return
+            if conflict == 'ask':
+                if not can_ask:
+                    raise FileExistsError(f"{member.name}: File exists (use --conflict overwrite or skip)")
+                if not typer.confirm(f"Overwrite {member.name}?"):
+                    return
+        if member.isdir():
+            directories.append(member)
+        if data_filter:
+            tar.extract(member, target_path, set_attrs=not member.isdir(), filter='fully_trusted')
+        else:
+            tar.extract(member, target_path, set_attrs=not member.isdir())
+
+    @staticmethod
+    def _set_directory_attrs(tar: tarfile.TarFile, directories: list[tarfile.TarInfo], target_path: Path):
+        """Set owner, mtime and mode of dirs after their content is written, like extractall"""
+        for member in sorted(directories, key=lambda info: info.name, reverse=True):
+            directory = os.path.join(target_path, member.name)
+            tar.chown(member, directory, False)
+            tar.utime(member, directory)
+            tar.chmod(member, directory)
@@ -1,15 +1,20 @@
 import os
+import uuid
 import zipfile
 import typer
 from pathlib import Path
 from typing import Optional
-from src.logging.logger import command_logger
+from src.logging.logger import add_counters, command_logger
+from src.utils.output import is_stream, open_binary_output
+from src.utils.walker import TreeWalker
+from src.utils.zip_engine import ZipEngine, ZipExtractor
 
 class ZipCommand:
     """Class for zip command"""
 
     @command_logger
-    def zip(self, folder: str, archive: str):
+    def zip(self, folder: str, archive: str, exclude: Optional[list[str]] = None, jobs: int = 1,
+            level: Optional[int] = None, update: bool = False):
         """make ZIP archive"""
         folder_path = Path(folder)
         archive_path = Path(archive)
@@ -19,34 +24,73 @@ class ZipCommand:
             raise NotADirectoryError(f"zip: {folder}: Not a directory")
         if not os.access(folder_path, os.R_OK):
             raise PermissionError(f"zip: {folder}: Permission denied")
-        if not archive_path.suffix.lower() == '.zip':
-            archive_path = archive_path.with_suffix('.zip')
-        if archive_path.exists():
-            if not os.access(archive_path, os.W_OK):
-                raise PermissionError(f"zip: {archive}: Permission denied")
-            if not typer.confirm(f"Overwrite {archive_path}?"):
-                typer.echo("Canceled")
-                return
+        if level is not None and not 0 <= level <= 9:
+            raise ValueError(f"zip: invalid compression level {level}")
+        streaming = is_stream(archive)
+        if streaming and update:
+            raise ValueError("zip: --update needs an archive file, not a stream")
+        if not streaming:
+            if not archive_path.suffix.lower() == '.zip':
+                archive_path = archive_path.with_suffix('.zip')
+            if archive_path.exists():
+                if not os.access(archive_path, os.W_OK):
+                    raise PermissionError(f"zip: {archive}: Permission denied")
+                if update:
+                    self._update(folder_path, archive_path, exclude, jobs, level)
+                    return
+                if not typer.confirm(f"Overwrite {archive_path}?"):
+                    typer.echo("Canceled")
+                    return
         try:
-            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(folder_path):
-                    for file in files:
-                        file_path = Path(root) / file
-                        try:
-                            arcname = file_path.relative_to(folder_path)
-                            zipf.write(file_path, arcname)
-                        except ValueError:
-                            zipf.write(file_path, file_path.name)
-            typer.echo(f"ZIP created {archive_path}")
+            walker = TreeWalker(exclude=exclude or ())
+            engine = ZipEngine(jobs, level)
+            with open_binary_output(archive_path) as output, \
+                    zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                engine.write_files(zipf, self._iter_members(walker, folder_path))
+            add_counters(files=engine.files, bytes=engine.bytes)
+            typer.echo(f"ZIP created {archive_path}", err=streaming)
         except Exception as e:
-            if archive_path.exists():
+            if not streaming and archive_path.exists():
                 try:
                     archive_path.unlink()
                 except Exception:
                     pass
             raise OSError(f"zip: failed to create archive: {str(e)}")
+
+    def _update(self, folder_path: Path, archive_path: Path, exclude: Optional[list[str]], jobs: int,
+                level: Optional[int]):
+        """Rewrite archive next to old one, unchanged members are copied without recompression"""
+        if not zipfile.is_zipfile(archive_path):
+            raise ValueError(f"zip: {archive_path}: Not a valid ZIP archive")
+        staging = archive_path.parent / f".{archive_path.name}.zip-{uuid.uuid4().hex[:8]}"
+        walker = TreeWalker(exclude=exclude or ())
+        engine = ZipEngine(jobs, level)
+        try:
+            with zipfile.ZipFile(archive_path, 'r') as previous, \
+                    zipfile.ZipFile(staging, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                engine.write_files(zipf, self._iter_members(walker, folder_path), previous)
+                removed = len(set(previous.NameToInfo) - set(zipf.NameToInfo))
+            os.replace(staging, archive_path)
+            add_counters(files=engine.files + engine.files_kept, bytes=engine.bytes + engine.bytes_kept)
+        except Exception as e:
+            staging.unlink(missing_ok=True)
+            raise OSError(f"zip: failed to update archive: {str(e)}")
+        typer.echo(f"ZIP updated {archive_path}: added {engine.files} files ({engine.bytes} bytes), "
+                   f"kept {engine.files_kept} unchanged ({engine.bytes_kept} bytes), removed {removed}")
+
+    def _iter_members(self, walker: TreeWalker, folder_path: Path):
+        """(path, arcname) for every file of folder"""
+        for entry in walker.walk(folder_path):
+            if not entry.is_file():
+                continue
+            file_path = Path(entry.path)
+            try:
+                yield file_path, str(file_path.relative_to(folder_path))
+            except ValueError:
+                yield file_path, file_path.name
+
     @command_logger
-    def unzip(self, archive: str, extract_path: Optional[str] = None):
+    def unzip(self, archive: str, extract_path: Optional[str] = None, jobs: int = 4):
         """Unzip zip archive"""
         archive_path = Path(archive)
         if not archive_path.exists():
@@ -61,20 +105,17 @@ class ZipCommand:
             target_path.mkdir(parents=True, exist_ok=True)
         if not os.access(target_path, os.W_OK):
             raise PermissionError(f"unzip: {target_path}: Permission denied")
+        extractor = ZipExtractor(archive_path, jobs)
         try:
             with zipfile.ZipFile(archive_path, 'r') as zipf:
-                file_list = zipf.namelist()
-                conflicting_files = []
-                for file in file_list:
-                    target_file = target_path / file
-                    if target_file.exists():
-                        conflicting_files.append(file)
-
-                if conflicting_files and not typer.confirm(
-                    f"Overwrite {len(conflicting_files)}?"
-                ):
-                    typer.echo("Canceled")
-                    return
-                zipf.extractall(target_path)
+                members = extractor.plan(zipf)
+            conflicting_files = extractor.conflicts(members, extractor.existing(target_path, members))
+            if conflicting_files and not typer.confirm(
+                f"Overwrite {len(conflicting_files)}?"
+            ):
+                typer.echo("Canceled")
+                return
+            extractor.extract(target_path, members)
+            add_counters(files=extractor.files, bytes=extractor.bytes)
         except Exception as e:
             raise OSError(f"unzip: failed to extract archive: {str(e)}")
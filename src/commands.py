@@ -1,119 +1,185 @@
 import typer
+from importlib import import_module
 from typing import Optional
-from src.class_commands.ls_com import LsCommand
-from src.class_commands.cat_com import CatCommand
-from src.class_commands.cd_com import CdCommand
-from src.class_commands.cp_com import CpCommand
-from src.class_commands.mv_com import MvCommand
-from src.class_commands.rm_com import RmCommand
-from src.class_commands.zip_com import ZipCommand
-from src.class_commands.tar_com import TarCommand
-from src.class_commands.touch_com import TouchCommand
-from src.class_commands.mkdir_com import MkdirCommand
-from src.class_commands.grep_com import GrepCommand
+from src.logging.logger import set_instrumentation
 
 app = typer.Typer()
 
-ls_command = LsCommand()
-cat_command = CatCommand()
-cd_command = CdCommand()
-cp_command = CpCommand()
-mv_command = MvCommand()
-rm_command = RmCommand()
-zip_command = ZipCommand()
-tar_command = TarCommand()
-touch_command = TouchCommand()
-mkdir_command = MkdirCommand()
-grep_command = GrepCommand()
+COMMAND_CLASSES = {
+    'ls': ('src.class_commands.ls_com', 'LsCommand'),
+    'cat': ('src.class_commands.cat_com', 'CatCommand'),
+    'cd': ('src.class_commands.cd_com', 'CdCommand'),
+    'cp': ('src.class_commands.cp_com', 'CpCommand'),
+    'mv': ('src.class_commands.mv_com', 'MvCommand'),
+    'rm': ('src.class_commands.rm_com', 'RmCommand'),
+    'zip': ('src.class_commands.zip_com', 'ZipCommand'),
+    'tar': ('src.class_commands.tar_com', 'TarCommand'),
+    'touch': ('src.class_commands.touch_com', 'TouchCommand'),
+    'mkdir': ('src.class_commands.mkdir_com', 'MkdirCommand'),
+    'grep': ('src.class_commands.grep_com', 'GrepCommand'),
+    'head': ('src.class_commands.head_com', 'HeadCommand'),
+    'tail': ('src.class_commands.tail_com', 'TailCommand'),
+}
+_instances = {}
+
+def get_command(name: str):
+    """Command object, its module (and tarfile, zipfile, re...) is imported on first use"""
+    if name not in _instances:
+        module_name, class_name = COMMAND_CLASSES[name]
+        _instances[name] = getattr(import_module(module_name), class_name)()
+    return _instances[name]
+
+@app.callback()
+def main(
+    stats: bool = typer.Option(False, "--stats", help="Print wall/CPU time, peak RSS, counters and throughput to stderr"),
+    profile: bool = typer.Option(False, "--profile", help="Print top functions by cumulative time (cProfile, main thread) to stderr"),
+):
+    """File system commands"""
+    set_instrumentation(stats, profile)
 
 @app.command()
 def ls(
     path: Optional[str] = typer.Argument(None),
-    detailed: bool = typer.Option(False, "-l", help="Use a long listing format")
+    detailed: bool = typer.Option(False, "-l", help="Use a long listing format"),
+    recursive: bool = typer.Option(False, "-R", help="List subdirectories recursively"),
+    all_files: bool = typer.Option(False, "-a", help="Do not ignore entries starting with ."),
+    by_size: bool = typer.Option(False, "-S", help="Sort by file size, largest first"),
+    by_time: bool = typer.Option(False, "-t", help="Sort by modification time, newest first"),
+    unsorted: bool = typer.Option(False, "-U", help="Do not sort; list entries in directory order"),
+    jobs: int = typer.Option(1, "-j", help="Threads for stat calls (network filesystems)"),
 ):
     """List information about the FILEs (the current directory by default)."""
-    ls_command.ls(path, detailed)
+    sort = "none" if unsorted else "size" if by_size else "time" if by_time else "name"
+    get_command('ls').ls(path, detailed, recursive, all_files, sort, jobs)
 
 @app.command()
-def cat(files: list[str] = typer.Argument(...)):
+def cat(
+    files: list[str] = typer.Argument(...),
+    byte_range: Optional[str] = typer.Option(None, "--range", help="Print only OFFSET:LEN bytes (OFFSET: to the end)"),
+):
     """Concatenate FILE(s) to standard output."""
-    cat_command.cat(files)
+    get_command('cat').cat(files, byte_range)
+
+@app.command()
+def head(
+    files: list[str] = typer.Argument(...),
+    lines: int = typer.Option(10, "-n", help="Number of lines"),
+):
+    """Print first lines of FILE(s)"""
+    get_command('head').head(files, lines)
+
+@app.command()
+def tail(
+    files: list[str] = typer.Argument(...),
+    lines: int = typer.Option(10, "-n", help="Number of lines"),
+    follow: bool = typer.Option(False, "-f", help="Output appended data as the file grows"),
+    sleep_interval: float = typer.Option(1.0, "-s", help="Seconds between checks with -f"),
+):
+    """Print last lines of FILE(s)"""
+    get_command('tail').tail(files, lines, follow, sleep_interval)
 
 @app.command()
 def cd(path: str = typer.Argument(...)):
     """Change the shell working directory."""
-    cd_command.cd(path)
+    get_command('cd').cd(path)
 
 @app.command()
 def cp(
     sources: list[str] = typer.Argument(..., help="file/dir"),
     destination: str = typer.Argument(..., help="Destination"),
-    recursive: bool = typer.Option(False, "-r", help="Recursion copy for dirs")
+    recursive: bool = typer.Option(False, "-r", help="Recursion copy for dirs"),
+    jobs: int = typer.Option(1, "-j", help="Number of files copied in parallel"),
+    update: bool = typer.Option(False, "--update", "-u", help="Copy only new or changed files (size, mtime)"),
+    checksum: bool = typer.Option(False, "--checksum", "-c", help="With --update compare content hash"),
 ):
     """Copy SOURCE to DEST, or multiple SOURCE(s) to DIRECTORY."""
-    cp_command.cp(sources, destination, recursive)
+    get_command('cp').cp(sources, destination, recursive, jobs, update, checksum)
 
 @app.command()
 def mv(
-    source: str = typer.Argument(..., help="file/dir"),
+    sources: list[str] = typer.Argument(..., help="file/dir"),
     destination: str = typer.Argument(..., help="Destonatoin"),
+    jobs: int = typer.Option(1, "-j", help="Number of files copied in parallel across filesystems"),
 ):
     """Moove or rename file/dir"""
-    mv_command.mv(source, destination)
+    get_command('mv').mv(sources, destination, jobs)
 
 @app.command()
 def rm(
-    path: str = typer.Argument(..., help="path to file/dir"),
+    paths: Optional[list[str]] = typer.Argument(None, help="path to file/dir"),
     recursive: bool = typer.Option(False, "-r", help="Recursion delet for dirs"),
+    use_trash: bool = typer.Option(False, "--trash", help="Move to trash of the filesystem instead of deleting"),
+    purge: bool = typer.Option(False, "--purge", help="Delete trash contents (of PATH filesystem or cwd)"),
+    restore: bool = typer.Option(False, "--restore", help="Move last trashed PATH back"),
+    jobs: int = typer.Option(4, "-j", help="Threads for -f and --purge"),
+    force: bool = typer.Option(False, "-f", help="Never prompt, ignore nonexistent files"),
+    from_file: Optional[str] = typer.Option(None, "--from-file",
+                                            help="Read paths from file ('-' for stdin), one per line or NUL-separated"),
 ):
     """Delete file/dir"""
-    rm_command.rm(path, recursive)
+    get_command('rm').rm(paths, recursive, use_trash, purge, restore, jobs, force, from_file)
 
 @app.command()
 def zip(
     folder: str = typer.Argument(..., help="Files for ZIP"),
-    archive: str = typer.Argument(..., help="ZIP archive")
+    archive: str = typer.Argument(..., help="ZIP archive"),
+    exclude: Optional[list[str]] = typer.Option(None, "--exclude", help="Skip files and dirs matching GLOB"),
+    jobs: int = typer.Option(1, "-j", help="Compress files in N processes"),
+    level: Optional[int] = typer.Option(None, "--level", "-l", help="Compression level 0-9 (0 stores files)"),
+    update: bool = typer.Option(False, "--update", "-u", help="Recompress only new and changed files of existing archive"),
 ):
     """ZIP dirs"""
-    zip_command.zip(folder, archive)
+    get_command('zip').zip(folder, archive, exclude, jobs, level, update)
 
 @app.command()
 def unzip(
     archive: str = typer.Argument(..., help="File"),
-    extract_path: Optional[str] = typer.Argument(None, help="Destination zip")
+    extract_path: Optional[str] = typer.Argument(None, help="Destination zip"),
+    jobs: int = typer.Option(4, "-j", help="Extract files in N threads"),
 ):
     """Unzip dirs"""
-    zip_command.unzip(archive, extract_path)
+    get_command('zip').unzip(archive, extract_path, jobs)
 
 @app.command()
 def tar(
-    folder: str = typer.Argument(..., help="Dir"),
-    archive: str = typer.Argument(..., help="name for archive")
+    folder: str = typer.Argument(..., help="Dir (archive with --list)"),
+    archive: Optional[str] = typer.Argument(None, help="name for archive"),
+    exclude: Optional[list[str]] = typer.Option(None, "--exclude", help="Skip files and dirs matching GLOB"),
+    codec: str = typer.Option("gz", "--codec", help="none, gz, bz2 or xz"),
+    level: Optional[int] = typer.Option(None, "--level", "-l", help="Compression level"),
+    jobs: int = typer.Option(1, "-j", help="Compress blocks in N threads"),
+    index: bool = typer.Option(False, "--index", help="Write seek index next to archive"),
+    list_members: bool = typer.Option(False, "--list", help="List members of archive"),
 ):
     """TAR dir"""
-    tar_command.tar(folder, archive)
+    if list_members:
+        get_command('tar').list_members(folder)
+        return
+    get_command('tar').tar(folder, archive, exclude, codec, level, jobs, index)
 
 @app.command()
 def untar(
     archive: str = typer.Argument(..., help="Dir"),
-    extract_path: Optional[str] = typer.Argument(None, help="Path to UnTAR")
+    extract_path: Optional[str] = typer.Argument(None, help="Path to UnTAR"),
+    conflict: str = typer.Option("ask", "--conflict", help="Existing files: ask, overwrite or skip"),
+    members: Optional[list[str]] = typer.Option(None, "--member", help="Extract only PATH using seek index"),
 ):
-    """UnTAR dir"""
-    tar_command.untar(archive, extract_path)
+    """UnTAR dir ('-' reads archive from stdin)"""
+    get_command('tar').untar(archive, extract_path, conflict, members)
 
 @app.command()
 def touch(
     files: list[str] = typer.Argument(..., help="Name file to create"),
 ):
     """Create files"""
-    touch_command.touch(files)
+    get_command('touch').touch(files)
 
 @app.command()
 def mkdir(
     directories: list[str] = typer.Argument(..., help="Name dir for create"),
 ):
     """Create dirs"""
-    mkdir_command.mkdir(directories)
+    get_command('mkdir').mkdir(directories)
 
 @app.command()
 def grep(
@@ -121,6 +187,24 @@ def grep(
     paths: list[str] = typer.Argument(..., help="File/dir for searh"),
     recursive: bool = typer.Option(False, "-r", help="Recursion search for dirs"),
     ignore_case: bool = typer.Option(False, "-i", help="Ignore register"),
+    jobs: int = typer.Option(1, "-j", help="Number of parallel workers"),
+    binary_files: str = typer.Option("binary", "--binary-files", help="binary, text or without-match"),
+    indexed: bool = typer.Option(False, "--indexed", help="Use trigram index of dirs"),
+    include: Optional[list[str]] = typer.Option(None, "--include", help="Search only files matching GLOB"),
+    exclude: Optional[list[str]] = typer.Option(None, "--exclude", help="Skip files and dirs matching GLOB"),
+    max_depth: Optional[int] = typer.Option(None, "--max-depth", help="Max depth of recursion"),
+    ignore_files: Optional[list[str]] = typer.Option(None, "--ignore-file",
+                                                     help="Name of .gitignore-style file to respect"),
 ):
     """Serach lines by pattern"""
-    grep_command.grep(pattern, paths, recursive, ignore_case, line_number=True)
+    get_command('grep').grep(pattern, paths, recursive, ignore_case, line_number=True, jobs=jobs,
+                             binary_files=binary_files, indexed=indexed, include=include, exclude=exclude,
+                             max_depth=max_depth, ignore_files=ignore_files)
+
+@app.command("grep-index")
+def grep_index(
+    path: str = typer.Argument(..., help="Dir for index"),
+    refresh: bool = typer.Option(False, "--refresh", help="Reindex only changed files"),
+):
+    """Build trigram index for grep --indexed"""
+    get_command('grep').build_index(path, refresh)
@@ -1,29 +1,152 @@
+import atexit
+import json
 import logging
-from functools import wraps
+import os
+import queue
+import stat
 import sys
+import time
+from functools import wraps
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Optional, Union
+
+DEFAULT_LOG_FILE = Path(__file__).with_name('shell.log')
+MAX_BYTES = 10 << 20
+BACKUP_COUNT = 3
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+logger = logging.getLogger('shell')
+_listener: Optional[QueueListener] = None
+_counters: dict[str, int] = {}
+_depth = 0
+_instrumentation = {'stats': False, 'profile': False}
+
+
+class LogFileHandler(RotatingFileHandler):
+    """Rotation decided by stream position, log path is checked once on open instead of every record"""
+
+    def _open(self):
+        stream = super()._open()
+        self.regular = stat.S_ISREG(os.fstat(stream.fileno()).st_mode)
+        return stream
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes <= 0 or not self.regular:
+            return False
+        return self.stream.tell() + len(self.format(record)) + 1 >= self.maxBytes
+
+
+class TextFormatter(logging.Formatter):
+    """Command line and result, two lines like before"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = self.formatTime(record, DATE_FORMAT)
+        fields = getattr(record, 'fields')
+        result = "SUCCESS" if fields['status'] == 'ok' else f"ERROR: {fields['error']}"
+        return f"[{timestamp}] {fields['command']}\n[{timestamp}] {result}"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per command"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {'time': self.formatTime(record, DATE_FORMAT), 'level': record.levelname}
+        entry.update(getattr(record, 'fields'))
+        return json.dumps(entry, ensure_ascii=False)
 
-def setup_logging():
-    """Log config"""
-    logging.basicConfig(
-        filename='src/logging/shell.log',
-        level=logging.INFO,
-        format='[%(asctime)s] %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-
-def command_logger(func, ):
-    """Decorator for logging commands"""
+
+def setup_logging(log_file: Union[str, Path, None] = None, json_format: Optional[bool] = None,
+                  max_bytes: Optional[int] = None, backup_count: Optional[int] = None):
+    """Log config, done once: records go through queue to file writer thread
+
+    Defaults come from SHELL_LOG_FILE, SHELL_LOG_FORMAT (text or json),
+    SHELL_LOG_MAX_BYTES and SHELL_LOG_BACKUPS.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    path: Union[str, Path] = log_file or os.environ.get('SHELL_LOG_FILE') or DEFAULT_LOG_FILE
+    if json_format is None:
+        json_format = os.environ.get('SHELL_LOG_FORMAT', 'text') == 'json'
+    if max_bytes is None:
+        max_bytes = int(os.environ.get('SHELL_LOG_MAX_BYTES', MAX_BYTES))
+    if backup_count is None:
+        backup_count = int(os.environ.get('SHELL_LOG_BACKUPS', BACKUP_COUNT))
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    handler = LogFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    handler.setFormatter(JsonFormatter() if json_format else TextFormatter())
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    logger.handlers = [QueueHandler(records)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _listener = QueueListener(records, handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write queued records and stop writer thread"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    logger.handlers = []
+
+
+def add_counters(**counters: int):
+    """Add to counters of running command, e.g. files=1, bytes=4096, stat_calls=10
+
+    Counters go to the log record and to --stats output of the outermost command.
+    """
+    for name, value in counters.items():
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_instrumentation(stats: bool = False, profile: bool = False):
+    """Measure next commands: --stats report and/or cProfile hotspots on stderr"""
+    _instrumentation['stats'] = stats
+    _instrumentation['profile'] = profile
+
+
+def command_logger(func):
+    """Decorator for logging commands, outermost command is measured if instrumentation is on"""
     @wraps(func)
     def wrapper(*args, **kwargs):
+        global _depth
         setup_logging()
+        metrics = None
+        if _depth == 0:
+            _counters.clear()
+            if _instrumentation['stats'] or _instrumentation['profile']:
+                from src.logging.metrics import CommandMetrics  # cProfile/pstats only when asked for
+                metrics = CommandMetrics(**_instrumentation)
+        _depth += 1
+        full_command = " ".join(sys.argv[1:])
+        start = time.perf_counter()
         try:
-            full_command = " ".join(sys.argv[1:])
             result = func(*args, **kwargs)
-            logging.info(f"{full_command}")
-            logging.info("SUCCESS")
-            return result
         except Exception as e:
-            logging.error(f"{full_command}")
-            logging.error(f"ERROR: {e}")
+            _log(logging.ERROR, full_command, start, error=str(e))
             raise
+        else:
+            _log(logging.INFO, full_command, start)
+        finally:
+            _depth -= 1
+            if metrics is not None:
+                metrics.stop(_counters)
+        return result
     return wrapper
+
+
+def _log(level: int, command: str, start: float, error: Optional[str] = None):
+    fields = {'command': command, 'status': 'error' if error else 'ok',
+              'duration_ms': round((time.perf_counter() - start) * 1000, 3), **_counters}
+    if error:
+        fields['error'] = error
+    logger.log(level, command, extra={'fields': fields})
@@ -0,0 +1,74 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+from typing import Optional
+
+if sys.platform != 'win32':
+    import resource
+
+PROFILE_TOP = 20
+PROFILE_SORT = 'cumulative'
+
+
+def cpu_time() -> float:
+    """User + system time of process and finished child processes"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size in bytes (largest of process and children), None if unknown"""
+    if sys.platform == 'win32':
+        return None
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class CommandMetrics:
+    """Measure one command run for --stats and --profile, report goes to stderr"""
+
+    def __init__(self, stats: bool = False, profile: bool = False):
+        self.stats = stats
+        self.profiler = cProfile.Profile() if profile else None
+        self.wall = time.perf_counter()
+        self.cpu = cpu_time()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self, counters: dict):
+        """Stop measuring and write report"""
+        if self.profiler is not None:
+            self.profiler.disable()
+        wall = time.perf_counter() - self.wall
+        cpu = cpu_time() - self.cpu
+        report = []
+        if self.stats:
+            report.append(self.format_stats(wall, cpu, peak_rss(), counters))
+        if self.profiler is not None:
+            report.append(self.format_profile())
+        sys.stdout.flush()
+        sys.stderr.write('\n'.join(report))
+        sys.stderr.flush()
+
+    @staticmethod
+    def format_stats(wall: float, cpu: float, rss: Optional[int], counters: dict) -> str:
+        """Times, memory, command counters and throughput, one value per line"""
+        lines = [f"wall time: {wall:.3f} s", f"cpu time: {cpu:.3f} s"]
+        if rss is not None:
+            lines.append(f"peak rss: {rss} bytes")
+        lines.extend(f"{name}: {value}" for name, value in counters.items())
+        if wall > 0 and counters.get('bytes'):
+            lines.append(f"throughput: {counters['bytes'] / wall / 1e6:.1f} MB/s")
+        if wall > 0 and counters.get('files'):
+            lines.append(f"files/s: {counters['files'] / wall:.0f}")
+        return ''.join(f"{line}\n" for line in lines)
+
+    def format_profile(self) -> str:
+        """Top functions by cumulative time (calling thread only)"""
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats(PROFILE_SORT).print_stats(PROFILE_TOP)
+        return out.getvalue()
@@ -0,0 +1,130 @@
+import bz2
+import gzip
+import io
+import lzma
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Optional, cast
+
+CODECS = ('none', 'gz', 'bz2', 'xz')
+TAR_SUFFIXES = {
+    'none': ('.tar',),
+    'gz': ('.tar.gz', '.tgz'),
+    'bz2': ('.tar.bz2', '.tbz2'),
+    'xz': ('.tar.xz', '.txz'),
+}
+LEVELS = {'gz': range(0, 10), 'bz2': range(1, 10), 'xz': range(0, 10)}
+DEFAULT_LEVELS = {'none': 0, 'gz': 6, 'bz2': 9, 'xz': 6}
+BLOCK_SIZES = {'gz': 1 << 20, 'bz2': 900_000, 'xz': 4 << 20}
+MAGIC = {b'\x1f\x8b': 'gz', b'BZh': 'bz2', b'\xfd7zXZ\x00': 'xz'}
+
+
+def compress_block(codec: str, data: bytes, level: int) -> bytes:
+    """Compress block as complete gzip member / bz2 stream / xz stream"""
+    if codec == 'gz':
+        return zlib.compress(data, level, wbits=31)
+    if codec == 'bz2':
+        return bz2.compress(data, level)
+    return lzma.compress(data, preset=level)
+
+
+def open_decompressed(fileobj: BinaryIO) -> io.BufferedIOBase:
+    """Wrap stream in decompressor chosen by magic bytes, concatenated members are read too"""
+    if isinstance(fileobj, io.BufferedReader):
+        reader = fileobj
+    else:
+        reader = io.BufferedReader(cast(io.RawIOBase, fileobj))  # only readinto() is used
+    head = reader.peek(6)[:6]
+    for magic, codec in MAGIC.items():
+        if head.startswith(magic):
+            if codec == 'gz':
+                return gzip.GzipFile(fileobj=reader, mode='rb')
+            if codec == 'bz2':
+                return bz2.BZ2File(reader)
+            return lzma.LZMAFile(reader)
+    return reader
+
+
+class BlockCompressor:
+    """Writable stream that compresses fixed-size blocks on several threads (pigz style)
+
+    Every block becomes a separate gzip member (bz2/xz stream), concatenation of
+    them is a valid compressed file and output does not depend on jobs.
+    """
+
+    def __init__(self, fileobj: BinaryIO, codec: str = 'gz', level: Optional[int] = None, jobs: int = 1):
+        self.fileobj = fileobj
+        self.codec = codec
+        self.level = DEFAULT_LEVELS[codec] if level is None else level
+        self.jobs = jobs
+        self.block_size = BLOCK_SIZES.get(codec, 0)
+        self.buffer = bytearray()
+        self.position = 0
+        self.submitted = 0
+        self.compressed = 0
+        self.checkpoints: list[tuple[int, int]] = []
+        self.pending: deque[tuple[int, Future]] = deque()
+        self.executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 and codec != 'none' else None
+
+    def write(self, data) -> int:
+        self.position += len(data)
+        if self.codec == 'none':
+            self.fileobj.write(data)
+            self.compressed += len(data)
+            return len(data)
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self._submit(bytes(self.buffer[:self.block_size]))
+            del self.buffer[:self.block_size]
+        return len(data)
+
+    def block_checkpoints(self) -> list[tuple[int, int]]:
+        """(uncompressed, compressed) offsets where independent blocks start"""
+        return [(0, 0)] if self.codec == 'none' else self.checkpoints
+
+    def tell(self) -> int:
+        """Uncompressed position"""
+        return self.position
+
+    def _submit(self, block: bytes):
+        offset = self.submitted
+        self.submitted += len(block)
+        if self.executor is None:
+            self._write_block(offset, compress_block(self.codec, block, self.level))
+            return
+        self.pending.append((offset, self.executor.submit(compress_block, self.codec, block, self.level)))
+        if len(self.pending) >= self.jobs * 2:
+            self._write_block(*self._result(self.pending.popleft()))
+
+    @staticmethod
+    def _result(item) -> tuple[int, bytes]:
+        offset, future = item
+        return offset, future.result()
+
+    def _write_block(self, offset: int, data: bytes):
+        """Write compressed block, remember where it starts"""
+        self.checkpoints.append((offset, self.compressed))
+        self.fileobj.write(data)
+        self.compressed += len(data)
+
+    def close(self):
+        """Compress rest of data and wait for all blocks"""
+        try:
+            if self.codec != 'none' and (self.buffer or not self.submitted):
+                self._submit(bytes(self.buffer))
+                self.buffer.clear()
+            while self.pending:
+                self._write_block(*self._result(self.pending.popleft()))
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
@@ -0,0 +1,181 @@
+import io
+import mmap
+import os
+import re
+from typing import Iterator, Optional
+
+BINARY_CHECK_SIZE = 32768
+REGEX_META = set('.^$*+?{}[]\\|()')
+HEX_DIGITS = set('0123456789abcdefABCDEF')
+ESCAPE_HEX_LENGTHS = {'x': 2, 'u': 4, 'U': 8}
+
+
+def is_literal(pattern: str) -> bool:
+    """Check that pattern has no regex metacharacters"""
+    return not REGEX_META.intersection(pattern)
+
+
+def _escape_end(pattern: str, i: int) -> int:
+    """Index after escape starting at pattern[i] (backslash), with its argument"""
+    escaped = pattern[i + 1:i + 2]
+    end = i + 2
+    if escaped in ESCAPE_HEX_LENGTHS:
+        limit = end + ESCAPE_HEX_LENGTHS[escaped]
+        while end < min(limit, len(pattern)) and pattern[end] in HEX_DIGITS:
+            end += 1
+    elif escaped == 'N' and pattern[end:end + 1] == '{':
+        closing = pattern.find('}', end)
+        end = closing + 1 if closing != -1 else len(pattern)
+    elif escaped.isdigit():
+        while end < min(i + 4, len(pattern)) and pattern[end].isdigit():
+            end += 1
+    return end
+
+
+def required_literal(pattern: str) -> str:
+    """Longest literal which must be in every match ('' if unknown)"""
+    if '|' in pattern or '(?' in pattern:
+        return ''
+    runs = []
+    current = ''
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if escaped and not escaped.isalnum():
+                i += 2
+                if depth == 0:
+                    current += escaped
+                continue
+            i = _escape_end(pattern, i)
+            runs.append(current)
+            current = ''
+            continue
+        if ch == '[':
+            runs.append(current)
+            current = ''
+            i += 1
+            if pattern[i:i + 1] == '^':
+                i += 1
+            if pattern[i:i + 1] == ']':
+                i += 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            i += 1
+            continue
+        if ch in '*?{':
+            current = current[:-1]
+            runs.append(current)
+            current = ''
+            if ch == '{':
+                closing = pattern.find('}', i)
+                i = closing if closing != -1 else len(pattern)
+        elif ch in '+.^$()':
+            runs.append(current)
+            current = ''
+            if ch == '(':
+                depth += 1
+            elif ch == ')':
+                depth -= 1
+        elif depth == 0:
+            current += ch
+        i += 1
+    runs.append(current)
+    return max(runs, key=len)
+
+
+class ByteSearcher:
+    """Search regex in file bytes, decode only lines around literal hits"""
+
+    def __init__(self, regex: re.Pattern):
+        self.regex = regex
+        ignore_case = bool(regex.flags & re.IGNORECASE)
+        literal = required_literal(regex.pattern)
+        if ignore_case and not literal.isascii():
+            literal = ''
+        self.literal = literal.encode('utf-8')
+        self.verify = ignore_case or not is_literal(regex.pattern)
+        self.literal_regex = None
+        if self.literal and ignore_case:
+            self.literal_regex = re.compile(re.escape(self.literal), re.IGNORECASE)
+        self.files = 0
+        self.bytes = 0
+
+    def search(self, file_path, binary_files: str = 'binary') -> Iterator[tuple[int, Optional[str]]]:
+        """Yield (line number, line); line is None for matched binary file"""
+        with open(file_path, 'rb') as file:
+            buffer = self._map(file)
+            self.files += 1
+            self.bytes += len(buffer)
+            try:
+                if not len(buffer):
+                    return
+                binary = b'\0' in buffer[:BINARY_CHECK_SIZE]
+                if binary and binary_files == 'without-match':
+                    return
+                for line_num, line in self._scan(buffer):
+                    if binary and binary_files == 'binary':
+                        yield line_num, None
+                        return
+                    yield line_num, line
+            finally:
+                if isinstance(buffer, mmap.mmap):
+                    buffer.close()
+
+    def _map(self, file):
+        """Memory-map real files, read others"""
+        if isinstance(file, io.BufferedReader):
+            try:
+                if os.fstat(file.fileno()).st_size:
+                    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass
+        return file.read()
+
+    def _find(self, buffer, pos: int) -> int:
+        """Position of next literal hit or -1"""
+        if self.literal_regex is None:
+            return buffer.find(self.literal, pos)
+        match = self.literal_regex.search(buffer, pos)
+        return match.start() if match else -1
+
+    def _scan(self, buffer) -> Iterator[tuple[int, str]]:
+        """Find lines matching regex"""
+        if not self.literal:
+            yield from self._scan_lines(buffer)
+            return
+        size = len(buffer)
+        line_num = 1
+        counted = 0
+        pos = 0
+        while pos < size:
+            hit = self._find(buffer, pos)
+            if hit == -1:
+                return
+            start = buffer.rfind(b'\n', 0, hit) + 1
+            end = buffer.find(b'\n', hit)
+            if end == -1:
+                end = size
+            line_num += buffer[counted:start].count(b'\n')
+            counted = start
+            line = buffer[start:end].decode('utf-8', errors='ignore').rstrip('\n\r')
+            if not self.verify or self.regex.search(line):
+                yield line_num, line
+            pos = end + 1
+
+    def _scan_lines(self, buffer) -> Iterator[tuple[int, str]]:
+        """Check every line when pattern has no literal part"""
+        size = len(buffer)
+        line_num = 0
+        pos = 0
+        while pos < size:
+            end = buffer.find(b'\n', pos)
+            if end == -1:
+                end = size
+            line_num += 1
+            line = buffer[pos:end].decode('utf-8', errors='ignore').rstrip('\n\r')
+            if self.regex.search(line):
+                yield line_num, line
+            pos = end + 1
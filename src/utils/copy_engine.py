@@ -0,0 +1,143 @@
+import hashlib
+import io
+import os
+import shutil
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from src.utils.kernel_copy import FALLBACK_ERRORS, kernel_copy
+from src.utils.sparse import copy_sparse, is_sparse, sparse_supported
+from src.utils.walker import TreeWalker
+
+COPY_CHUNK = 1 << 20
+
+
+def copy_file(source, destination) -> int:
+    """Copy file data and metadata like shutil.copy2, return size"""
+    with open(source, 'rb') as fsrc, open(destination, 'wb') as fdst:
+        if isinstance(fsrc, io.BufferedReader) and isinstance(fdst, io.BufferedWriter):
+            size = _copy_fd(fsrc.fileno(), fdst.fileno())
+        else:
+            size = None
+        if size is None:
+            shutil.copyfileobj(fsrc, fdst, COPY_CHUNK)
+            size = fdst.tell()
+    shutil.copystat(source, destination)
+    return size
+
+
+def _copy_fd(in_fd: int, out_fd: int):
+    """Sparse-aware kernel copy, size or None to fall back to buffered copy"""
+    stat_info = os.fstat(in_fd)
+    if sparse_supported() and is_sparse(stat_info):
+        try:
+            copy_sparse(in_fd, out_fd, stat_info.st_size)
+            return stat_info.st_size
+        except OSError as e:
+            if e.errno not in FALLBACK_ERRORS:
+                raise
+            os.lseek(in_fd, 0, os.SEEK_SET)
+            os.ftruncate(out_fd, 0)
+    if kernel_copy(in_fd, out_fd):
+        return os.lseek(out_fd, 0, os.SEEK_CUR)
+    return None
+
+
+def file_digest(path) -> bytes:
+    """BLAKE2 digest of file content"""
+    with open(path, 'rb') as file:
+        return hashlib.file_digest(file, 'blake2b').digest()
+
+
+def is_unchanged(source, destination, checksum: bool = False) -> bool:
+    """Check destination like rsync: size and mtime, or content hash"""
+    try:
+        dst_stat = os.stat(destination)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(source)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if checksum:
+        return file_digest(source) == file_digest(destination)
+    return int(src_stat.st_mtime) == int(dst_stat.st_mtime)
+
+
+class CopyEngine:
+    """Copy dir trees with several files in flight"""
+
+    def __init__(self, jobs: int = 1, update: bool = False, checksum: bool = False,
+                 symlinks: bool = False):
+        self.jobs = jobs
+        self.update = update
+        self.checksum = checksum
+        self.symlinks = symlinks
+        self.files_copied = 0
+        self.bytes_copied = 0
+        self.files_skipped = 0
+        self.bytes_skipped = 0
+
+    def copy(self, source, destination) -> tuple[bool, int]:
+        """Copy file unless --update finds it unchanged, return (copied, size)"""
+        if self.update and is_unchanged(source, destination, self.checksum):
+            return False, os.stat(source).st_size
+        return True, copy_file(source, destination)
+
+    def copy_one(self, source, destination):
+        """Copy single file and count it"""
+        self._count(self.copy(source, destination))
+
+    def _count(self, result: tuple[bool, int]):
+        copied, size = result
+        if copied:
+            self.files_copied += 1
+            self.bytes_copied += size
+        else:
+            self.files_skipped += 1
+            self.bytes_skipped += size
+
+    def copy_tree(self, source: Path, destination: Path):
+        """Copy dir like shutil.copytree (symlinks are followed unless symlinks=True)"""
+        errors = []
+        dirs = [(source, destination)]
+        destination.mkdir(exist_ok=self.update)
+        walker = TreeWalker(follow_symlinks=not self.symlinks, yield_dirs=True,
+                            onerror=lambda e: errors.append((e.filename, e.filename, str(e))))
+        pending: deque[tuple[Path, Path, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for entry in walker.walk(source):
+                src = Path(entry.path)
+                dst = destination / src.relative_to(source)
+                try:
+                    if self.symlinks and entry.is_symlink():
+                        os.symlink(os.readlink(src), dst)
+                        continue
+                    if entry.is_dir():
+                        dst.mkdir(exist_ok=self.update)
+                        dirs.append((src, dst))
+                        continue
+                    if not entry.is_file():
+                        raise shutil.SpecialFileError(f"`{src}` is not a regular file")
+                except OSError as e:
+                    errors.append((str(src), str(dst), str(e)))
+                    continue
+                pending.append((src, dst, executor.submit(self.copy, src, dst)))
+                if len(pending) >= self.jobs * 4:
+                    self._collect(pending.popleft(), errors)
+            while pending:
+                self._collect(pending.popleft(), errors)
+        for src, dst in reversed(dirs):
+            try:
+                shutil.copystat(src, dst)
+            except OSError as e:
+                errors.append((str(src), str(dst), str(e)))
+        if errors:
+            raise shutil.Error(errors)
+
+    def _collect(self, item, errors: list):
+        """Wait for one copy"""
+        src, dst, future = item
+        try:
+            self._count(future.result())
+        except OSError as e:
+            errors.append((str(src), str(dst), str(e)))
@@ -0,0 +1,27 @@
+import errno
+import os
+
+KERNEL_COPY_CHUNK = 1 << 30
+FALLBACK_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+
+
+def kernel_copy(in_fd: int, out_fd: int) -> bool:
+    """Copy with copy_file_range/sendfile, False if kernel can't do it"""
+    for name in ('copy_file_range', 'sendfile'):
+        function = getattr(os, name, None)
+        if function is None:
+            continue
+        copied = 0
+        try:
+            while True:
+                if name == 'copy_file_range':
+                    sent = function(in_fd, out_fd, KERNEL_COPY_CHUNK)
+                else:
+                    sent = function(out_fd, in_fd, None, KERNEL_COPY_CHUNK)
+                if sent == 0:
+                    return True
+                copied += sent
+        except OSError as e:
+            if copied or e.errno not in FALLBACK_ERRORS:
+                raise
+    return False
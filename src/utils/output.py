@@ -0,0 +1,151 @@
+import io
+import os
+import stat
+import sys
+import typer
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+from src.utils.kernel_copy import FALLBACK_ERRORS, kernel_copy
+
+BUFFER_SIZE = 1 << 16
+CHUNK_SIZE = 1 << 20
+KERNEL_CHUNK = 1 << 30
+
+
+def is_stream(path: str) -> bool:
+    """'-' (stdout) or existing pipe/FIFO/device, written sequentially without prompts"""
+    if path == '-':
+        return True
+    try:
+        mode = os.stat(path).st_mode
+    except OSError:
+        return False
+    return not stat.S_ISREG(mode) and not stat.S_ISDIR(mode)
+
+
+@contextmanager
+def open_binary_output(path) -> Iterator[BinaryIO]:
+    """Binary file for writing, '-' gives stdout which is flushed but not closed"""
+    if str(path) == '-':
+        yield sys.stdout.buffer
+        sys.stdout.buffer.flush()
+        return
+    with open(path, 'wb') as file:
+        yield file
+
+
+def _fileno(stream) -> Optional[int]:
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _send_range(in_fd: int, out_fd: int, offset: int, length: int) -> int:
+    """sendfile up to length bytes from offset, return bytes sent (0 if kernel can't)"""
+    sent = 0
+    try:
+        while sent < length:
+            count = os.sendfile(out_fd, in_fd, offset + sent, min(length - sent, KERNEL_CHUNK))
+            if count == 0:
+                break
+            sent += count
+    except OSError as e:
+        if sent or e.errno not in FALLBACK_ERRORS:
+            raise
+    return sent
+
+
+def copy_to_output(source: BinaryIO, output: BinaryIO, length: Optional[int] = None) -> int:
+    """Raw bytes from current position of source (length or to EOF) to output, return bytes copied
+
+    sendfile/copy_file_range when source is a seekable file and output a real fd,
+    fixed-size chunks otherwise (pipes, terminals, /dev/stdin).
+    """
+    out_fd = _fileno(output)
+    copied = 0
+    if out_fd is not None and isinstance(source, io.BufferedReader) and source.seekable():
+        output.flush()
+        start = source.seek(source.tell())
+        if length is None:
+            if kernel_copy(source.fileno(), out_fd):
+                end = os.lseek(source.fileno(), 0, os.SEEK_CUR)
+                source.seek(end)
+                return end - start
+        else:
+            copied = _send_range(source.fileno(), out_fd, start, length)
+            source.seek(start + copied)
+            length -= copied
+            if not length:
+                return copied
+    if length is None:
+        while chunk := source.read(CHUNK_SIZE):
+            output.write(chunk)
+            copied += len(chunk)
+        return copied
+    while length > 0:
+        chunk = source.read(min(length, CHUNK_SIZE))
+        if not chunk:
+            break
+        output.write(chunk)
+        copied += len(chunk)
+        length -= len(chunk)
+    return copied
+
+
+def skip_input(source: BinaryIO, count: int):
+    """Move COUNT bytes forward: seek when source can, read and discard otherwise (pipes)"""
+    if source.seekable():
+        source.seek(count, os.SEEK_CUR)
+        return
+    while count > 0:
+        chunk = source.read(min(count, CHUNK_SIZE))
+        if not chunk:
+            break
+        count -= len(chunk)
+
+
+class OutputBuffer:
+    """Collect output lines and write them to stdout in large chunks"""
+
+    def __init__(self, color: Optional[bool] = None, buffer_size: int = BUFFER_SIZE):
+        self.color = self._is_tty() if color is None else color
+        self.buffer_size = buffer_size
+        self.parts: list[str] = []
+        self.size = 0
+
+    @staticmethod
+    def _is_tty() -> bool:
+        """Colors only for terminal"""
+        try:
+            return sys.stdout.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def style(self, text: str, **styles) -> str:
+        """Add ANSI style if output is terminal"""
+        return typer.style(text, **styles) if self.color else text
+
+    def write(self, text: str):
+        """Add text to buffer"""
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def line(self, text: str = ""):
+        """Add line to buffer"""
+        self.write(text + "\n")
+
+    def flush(self):
+        """Write buffer to stdout"""
+        if self.parts:
+            typer.echo("".join(self.parts), nl=False, color=True)
+            self.parts = []
+            self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
@@ -0,0 +1,72 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+DIR_FLAGS = os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW
+
+
+def remove_entry_at(parent_fd: Optional[int], name: str, is_dir: bool) -> tuple[int, int]:
+    """Delete file or dir tree relative to parent fd, return (files, bytes)"""
+    if not is_dir:
+        size = os.stat(name, dir_fd=parent_fd, follow_symlinks=False).st_size
+        os.unlink(name, dir_fd=parent_fd)
+        return 1, size
+    files = size = 0
+    fd = os.open(name, DIR_FLAGS, dir_fd=parent_fd)
+    try:
+        with os.scandir(fd) as iterator:
+            entries = list(iterator)
+        for entry in entries:
+            removed_files, removed_size = remove_entry_at(fd, entry.name,
+                                                          entry.is_dir(follow_symlinks=False))
+            files += removed_files
+            size += removed_size
+    finally:
+        os.close(fd)
+    os.rmdir(name, dir_fd=parent_fd)
+    return files, size
+
+
+class ParallelRemover:
+    """Delete many paths on a thread pool, subtrees of dirs are split between workers"""
+
+    def __init__(self, jobs: int = 4):
+        self.jobs = jobs
+        self.files = 0
+        self.bytes = 0
+        self.errors: list[tuple[Path, OSError]] = []
+
+    def remove(self, paths: list[Path]):
+        dir_fds = {}
+        futures = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                for path in paths:
+                    if not path.is_dir() or path.is_symlink():
+                        futures.append((path, executor.submit(remove_entry_at, None, str(path), False)))
+                        continue
+                    try:
+                        fd = os.open(path, DIR_FLAGS)
+                        dir_fds[path] = fd
+                        with os.scandir(fd) as children:
+                            for child in children:
+                                futures.append((path / child.name, executor.submit(
+                                    remove_entry_at, fd, child.name, child.is_dir(follow_symlinks=False))))
+                    except OSError as e:
+                        self.errors.append((path, e))
+                for path, future in futures:
+                    try:
+                        files, size = future.result()
+                        self.files += files
+                        self.bytes += size
+                    except OSError as e:
+                        self.errors.append((path, e))
+        finally:
+            for fd in dir_fds.values():
+                os.close(fd)
+        for path in dir_fds:
+            try:
+                os.rmdir(path)
+            except OSError as e:
+                self.errors.append((path, e))
@@ -0,0 +1,45 @@
+import errno
+import os
+
+COPY_CHUNK = 1 << 20
+
+
+def is_sparse(stat_info: os.stat_result) -> bool:
+    """File has fewer allocated blocks than its size"""
+    blocks = getattr(stat_info, 'st_blocks', None)
+    return blocks is not None and blocks * 512 < stat_info.st_size
+
+
+def data_segments(fd: int, size: int) -> list[tuple[int, int]]:
+    """(offset, length) of data regions found with SEEK_DATA/SEEK_HOLE"""
+    segments = []
+    pos = 0
+    while pos < size:
+        try:
+            data = os.lseek(fd, pos, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                break
+            raise
+        hole = min(os.lseek(fd, data, os.SEEK_HOLE), size)
+        segments.append((data, hole - data))
+        pos = hole
+    os.lseek(fd, 0, os.SEEK_SET)
+    return segments
+
+
+def sparse_supported() -> bool:
+    return hasattr(os, 'SEEK_DATA') and hasattr(os, 'SEEK_HOLE')
+
+
+def copy_sparse(in_fd: int, out_fd: int, size: int):
+    """Copy only data regions, holes stay unallocated in destination"""
+    for offset, length in data_segments(in_fd, size):
+        end = offset + length
+        while offset < end:
+            chunk = os.pread(in_fd, min(COPY_CHUNK, end - offset), offset)
+            if not chunk:
+                break
+            os.pwrite(out_fd, chunk, offset)
+            offset += len(chunk)
+    os.ftruncate(out_fd, size)
@@ -0,0 +1,77 @@
+import os
+import tarfile
+from src.utils.sparse import COPY_CHUNK, data_segments, is_sparse, sparse_supported
+
+
+class SparseMemberReader:
+    """Data of GNU PAX 1.0 sparse tar member: sparse map block, then data regions"""
+
+    def __init__(self, fd: int, segments: list[tuple[int, int]], size: int):
+        if not segments or sum(segments[-1]) < size:
+            segments = segments + [(size, 0)]
+        sparse_map = f"{len(segments)}\n" + "".join(f"{offset}\n{length}\n" for offset, length in segments)
+        header = sparse_map.encode('ascii')
+        padding = -len(header) % tarfile.BLOCKSIZE
+        self.header = header + b"\0" * padding
+        self.fd = fd
+        self.segments = segments
+        self.stored_size = len(self.header) + sum(length for _, length in segments)
+        self._chunks = self._iter_chunks()
+        self._chunk = b""
+        self._pos = 0
+
+    def _iter_chunks(self):
+        yield self.header
+        for offset, length in self.segments:
+            end = offset + length
+            while offset < end:
+                chunk = os.pread(self.fd, min(COPY_CHUNK, end - offset), offset)
+                if not chunk:
+                    raise OSError(f"file shrank while reading at offset {offset}")
+                yield chunk
+                offset += len(chunk)
+
+    def read(self, size: int = -1) -> bytes:
+        parts = []
+        while size != 0:
+            if self._pos >= len(self._chunk):
+                self._chunk = next(self._chunks, b"")
+                self._pos = 0
+                if not self._chunk:
+                    break
+            available = len(self._chunk) - self._pos
+            take = available if size < 0 else min(size, available)
+            parts.append(self._chunk[self._pos:self._pos + take])
+            self._pos += take
+            if size > 0:
+                size -= take
+        return b"".join(parts)
+
+
+def add_sparse_member(tar: tarfile.TarFile, path: str, arcname: str) -> bool:
+    """Add sparse file in GNU PAX 1.0 format, False if file is not sparse"""
+    if not sparse_supported() or tar.format != tarfile.PAX_FORMAT:
+        return False
+    tarinfo = tar.gettarinfo(path, arcname)
+    if not tarinfo.isreg():
+        return False
+    with open(path, 'rb') as file:
+        stat_info = os.fstat(file.fileno())
+        if not is_sparse(stat_info):
+            return False
+        try:
+            segments = data_segments(file.fileno(), stat_info.st_size)
+        except OSError:
+            return False
+        reader = SparseMemberReader(file.fileno(), segments, stat_info.st_size)
+        directory, name = os.path.split(tarinfo.name)
+        tarinfo.pax_headers = {
+            "GNU.sparse.major": "1",
+            "GNU.sparse.minor": "0",
+            "GNU.sparse.name": tarinfo.name,
+            "GNU.sparse.realsize": str(stat_info.st_size),
+        }
+        tarinfo.name = os.path.join(directory, "GNUSparseFile.0", name)
+        tarinfo.size = reader.stored_size
+        tar.addfile(tarinfo, reader)
+    return True
@@ -0,0 +1,229 @@
+import bz2
+import contextlib
+import io
+import lzma
+import sqlite3
+import tarfile
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+from src.utils.block_compress import MAGIC, open_decompressed
+
+INDEX_SUFFIX = '.idx'
+READ_CHUNK = 1 << 20
+Decompressor = Union['zlib._Decompress', bz2.BZ2Decompressor, lzma.LZMADecompressor]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    uoffset INTEGER PRIMARY KEY,
+    coffset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    name TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def detect_codec(fileobj: io.BufferedReader) -> str:
+    """Codec by magic bytes at current position of buffered stream"""
+    head = fileobj.peek(6)[:6]
+    for magic, codec in MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return 'none'
+
+
+def drop_members(tar: tarfile.TarFile) -> list[tarfile.TarInfo]:
+    """Take members TarFile has cached so far, streaming code keeps memory flat this way
+
+    TarFile keeps every member it reads or writes in its undocumented members list,
+    this is the only place that touches it.
+    """
+    members: list[tarfile.TarInfo] = getattr(tar, 'members')
+    setattr(tar, 'members', [])
+    return members
+
+
+def member_size(tarinfo: tarfile.TarInfo) -> int:
+    """Real size of member, also for sparse members being written"""
+    return int(tarinfo.pax_headers.get('GNU.sparse.realsize', tarinfo.size))
+
+
+class CheckpointReader(io.RawIOBase):
+    """Decompress concatenated members, record (uncompressed, compressed) offset of every member start"""
+
+    def __init__(self, fileobj: BinaryIO, codec: str):
+        self.fileobj = fileobj
+        self.codec = codec
+        self.decompressor: Optional[Decompressor] = None
+        self.input = b''
+        self.file_position = 0
+        self.position = 0
+        self.checkpoints: list[tuple[int, int]] = []
+
+    def readable(self) -> bool:
+        return True
+
+    def _new_decompressor(self) -> Decompressor:
+        if self.codec == 'gz':
+            return zlib.decompressobj(31)
+        if self.codec == 'bz2':
+            return bz2.BZ2Decompressor()
+        return lzma.LZMADecompressor()
+
+    def _fill(self) -> bool:
+        chunk = self.fileobj.read(READ_CHUNK)
+        self.file_position += len(chunk)
+        self.input = chunk
+        return bool(chunk)
+
+    def _needs_input(self, decompressor: Decompressor) -> bool:
+        if self.input:
+            return False
+        if isinstance(decompressor, (bz2.BZ2Decompressor, lzma.LZMADecompressor)):
+            return decompressor.needs_input
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = len(buffer)
+        out = bytearray()
+        while len(out) < size:
+            if self.decompressor is None or self.decompressor.eof:
+                if not self.input and not self._fill():
+                    break
+                self.checkpoints.append((self.position + len(out), self.file_position - len(self.input)))
+                self.decompressor = self._new_decompressor()
+            decompressor = self.decompressor
+            if self._needs_input(decompressor) and not self._fill():
+                raise EOFError("compressed file ended before the end-of-stream marker was reached")
+            out += decompressor.decompress(self.input, size - len(out))
+            if decompressor.eof:
+                self.input = decompressor.unused_data
+            elif not isinstance(decompressor, (bz2.BZ2Decompressor, lzma.LZMADecompressor)):
+                self.input = decompressor.unconsumed_tail
+            else:
+                self.input = b''
+        buffer[:len(out)] = out
+        self.position += len(out)
+        return len(out)
+
+
+class TarIndex:
+    """Side file with compressed stream checkpoints and tar member offsets"""
+
+    def __init__(self, archive_path: Path):
+        self.archive_path = Path(archive_path)
+        self.path = Path(f"{self.archive_path}{INDEX_SUFFIX}")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _stamp(self) -> tuple[int, int]:
+        info = self.archive_path.stat()
+        return info.st_size, info.st_mtime_ns
+
+    def is_current(self) -> bool:
+        """Index exists and was made for this archive content"""
+        if not self.path.is_file():
+            return False
+        connection = self._connect()
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+        finally:
+            connection.close()
+        return (meta.get('size'), meta.get('mtime_ns')) == self._stamp()
+
+    def write(self, codec: str, checkpoints: Iterable[tuple[int, int]], members: Iterable[tuple[str, int, int]]):
+        """Replace index content"""
+        self.path.unlink(missing_ok=True)
+        size, mtime_ns = self._stamp()
+        connection = self._connect()
+        try:
+            connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                   (('codec', codec), ('size', size), ('mtime_ns', mtime_ns)))
+            connection.executemany("INSERT OR REPLACE INTO checkpoints (uoffset, coffset) VALUES (?, ?)",
+                                   checkpoints)
+            connection.executemany("INSERT OR REPLACE INTO members (name, offset, size) VALUES (?, ?, ?)",
+                                   members)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def build(self) -> bool:
+        """Index archive in one decompression pass, False if index file can't be written"""
+        members = []
+        with open(self.archive_path, 'rb') as file:
+            codec = detect_codec(file)
+            checkpoint_reader = None if codec == 'none' else CheckpointReader(file, codec)
+            reader = file if checkpoint_reader is None else io.BufferedReader(checkpoint_reader, READ_CHUNK)
+            with tarfile.open(fileobj=reader, mode='r|') as tar:
+                for tarinfo in tar:
+                    members.append((tarinfo.name.rstrip('/'), tarinfo.offset, tarinfo.size))
+                    drop_members(tar)
+            checkpoints = [(0, 0)] if checkpoint_reader is None else checkpoint_reader.checkpoints
+        try:
+            self.write(codec, checkpoints, members)
+        except (sqlite3.OperationalError, OSError):
+            with contextlib.suppress(OSError):
+                self.path.unlink(missing_ok=True)
+            return False
+        return True
+
+    def ensure(self) -> bool:
+        """Build index if it is missing or stale, False if it can't be written (read-only dir)"""
+        return self.is_current() or self.build()
+
+    def names(self) -> Iterator[tuple[str, int]]:
+        """(name, size) of members in archive order"""
+        connection = self._connect()
+        try:
+            yield from connection.execute("SELECT name, size FROM members ORDER BY offset")
+        finally:
+            connection.close()
+
+    def lookup(self, name: str) -> list[int]:
+        """Header offsets of member and, for dirs, of members under it"""
+        name = name.rstrip('/')
+        prefix = name + '/'
+        connection = self._connect()
+        try:
+            return [offset for offset, in connection.execute(
+                "SELECT offset FROM members WHERE name = ? OR substr(name, 1, ?) = ? ORDER BY offset",
+                (name, len(prefix), prefix))]
+        finally:
+            connection.close()
+
+    def open_at(self, offset: int) -> tuple[io.BufferedReader, io.BufferedIOBase]:
+        """(file, uncompressed stream) positioned at offset, decompression starts at nearest checkpoint"""
+        connection = self._connect()
+        try:
+            uoffset, coffset = connection.execute(
+                "SELECT uoffset, coffset FROM checkpoints WHERE uoffset <= ? ORDER BY uoffset DESC LIMIT 1",
+                (offset,)).fetchone()
+        finally:
+            connection.close()
+        file = open(self.archive_path, 'rb')
+        try:
+            file.seek(coffset)
+            stream = open_decompressed(file)
+            skip = offset - uoffset
+            if stream is file:
+                file.seek(offset)
+                skip = 0
+            while skip:
+                chunk = stream.read(min(skip, READ_CHUNK))
+                if not chunk:
+                    raise EOFError(f"{self.archive_path}: index does not match archive")
+                skip -= len(chunk)
+        except BaseException:
+            file.close()
+            raise
+        return file, stream
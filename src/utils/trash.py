@@ -0,0 +1,118 @@
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+from src.utils.remove import ParallelRemover
+
+TRASH_NAME = '.shell-trash'
+
+
+def home_trash() -> Path:
+    return Path.home() / '.local' / 'share' / 'shell-trash'
+
+
+def _same_device(path: Path, device: int) -> bool:
+    try:
+        return os.stat(path).st_dev == device
+    except OSError:
+        return False
+
+
+def _trash_root(path: Path) -> Path:
+    """Home trash if on the same filesystem, else topmost writable dir of filesystem"""
+    path = path.absolute()
+    device = os.lstat(path).st_dev
+    home = home_trash()
+    if _same_device(Path.home(), device) and not path.is_relative_to(home):
+        return home
+    best = None
+    for parent in path.parents:
+        try:
+            if os.stat(parent).st_dev != device:
+                break
+        except OSError:
+            break
+        if os.access(parent, os.W_OK):
+            best = parent
+    if best is None:
+        raise PermissionError(f"no writable dir for trash on the filesystem of '{path}'")
+    return best / TRASH_NAME
+
+
+def _find_trashes(path: Path) -> list[Path]:
+    """Trash dirs for filesystem of path: home trash and trashes in parents"""
+    path = path.absolute()
+    device = os.stat(path).st_dev
+    trashes = []
+    if home_trash().is_dir() and _same_device(home_trash(), device):
+        trashes.append(home_trash())
+    for parent in (path, *path.parents):
+        try:
+            if os.stat(parent).st_dev != device:
+                break
+        except OSError:
+            break
+        if (parent / TRASH_NAME).is_dir():
+            trashes.append(parent / TRASH_NAME)
+    return trashes
+
+
+def move_to_trash(path: Path) -> Path:
+    """Atomically rename path into trash, return trashed path"""
+    trash = _trash_root(path)
+    (trash / 'files').mkdir(parents=True, exist_ok=True)
+    (trash / 'info').mkdir(exist_ok=True)
+    item_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    info = {"path": str(path.absolute()), "deleted": time.time()}
+    info_path = trash / 'info' / f"{item_id}.json"
+    info_path.write_text(json.dumps(info), encoding='utf-8')
+    target = trash / 'files' / item_id
+    try:
+        os.rename(path, target)
+    except OSError:
+        info_path.unlink(missing_ok=True)
+        raise
+    return target
+
+
+def restore_from_trash(path: Path) -> Optional[Path]:
+    """Move last trashed copy of path back, None if not found"""
+    original = str(path.absolute())
+    latest = None
+    for trash in _find_trashes(path.absolute().parent):
+        for info_path in (trash / 'info').glob('*.json'):
+            try:
+                info = json.loads(info_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            if info.get("path") == original and (latest is None or info["deleted"] > latest[0]):
+                latest = (info["deleted"], trash, info_path)
+    if latest is None:
+        return None
+    _, trash, info_path = latest
+    if path.exists() or path.is_symlink():
+        raise FileExistsError(f"'{path}' already exists")
+    os.rename(trash / 'files' / info_path.stem, path)
+    info_path.unlink()
+    return path
+
+
+def purge_trash(path: Path, jobs: int = 4) -> int:
+    """Delete trash contents in parallel, return number of purged items"""
+    purged = 0
+    for trash in _find_trashes(path):
+        files_dir = trash / 'files'
+        if not files_dir.is_dir():
+            continue
+        items = list(files_dir.iterdir())
+        remover = ParallelRemover(jobs)
+        remover.remove(items)
+        if remover.errors:
+            path, error = remover.errors[0]
+            raise OSError(f"cannot purge '{path}': {error.strerror or error}")
+        for item in items:
+            (trash / 'info' / f"{item.name}.json").unlink(missing_ok=True)
+        purged += len(items)
+    return purged
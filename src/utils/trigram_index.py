@@ -0,0 +1,141 @@
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+INDEX_NAME = '.grep_index.db'
+CHUNK_SIZE = 1 << 20
+TRIGRAM = re.compile(b'(?=(...))', re.DOTALL)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram BLOB NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+"""
+
+
+def file_trigrams(file_path) -> set[bytes]:
+    """Set of lowercased trigrams of file"""
+    trigrams = set()
+    tail = b''
+    with open(file_path, 'rb') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            data = tail + chunk.lower()
+            trigrams.update(TRIGRAM.findall(data))
+            tail = data[-2:]
+    return trigrams
+
+
+class TrigramIndex:
+    """On-disk trigram index of files under root"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.path = self.root / INDEX_NAME
+
+    def exists(self) -> bool:
+        return self.path.is_file()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _walk(self) -> Iterator[Path]:
+        """Files under root in sorted order, index file excluded"""
+        for root, dirs, files in os.walk(self.root):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = Path(root) / name
+                if file_path != self.path:
+                    yield file_path
+
+    def update(self, rebuild: bool = False) -> tuple[int, int, int]:
+        """Reindex new and changed files, return (total, updated, removed)"""
+        if rebuild and self.path.exists():
+            self.path.unlink()
+        connection = self._connect()
+        try:
+            known = {path: (file_id, mtime_ns, size) for file_id, path, mtime_ns, size
+                     in connection.execute("SELECT id, path, mtime_ns, size FROM files")}
+            seen = set()
+            updated = 0
+            for file_path in self._walk():
+                relative = str(file_path.relative_to(self.root))
+                try:
+                    info = file_path.stat()
+                except OSError:
+                    continue
+                seen.add(relative)
+                old = known.get(relative)
+                if old and old[1:] == (info.st_mtime_ns, info.st_size):
+                    continue
+                try:
+                    trigrams = file_trigrams(file_path)
+                except OSError:
+                    continue
+                if old:
+                    connection.execute("DELETE FROM postings WHERE file_id = ?", (old[0],))
+                    connection.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?",
+                                       (info.st_mtime_ns, info.st_size, old[0]))
+                    file_id = old[0]
+                else:
+                    file_id = connection.execute(
+                        "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                        (relative, info.st_mtime_ns, info.st_size)).lastrowid
+                connection.executemany("INSERT INTO postings (trigram, file_id) VALUES (?, ?)",
+                                       ((trigram, file_id) for trigram in trigrams))
+                updated += 1
+            removed = [(file_id,) for path, (file_id, _, _) in known.items() if path not in seen]
+            connection.executemany("DELETE FROM postings WHERE file_id = ?", removed)
+            connection.executemany("DELETE FROM files WHERE id = ?", removed)
+            connection.commit()
+            return len(seen), updated, len(removed)
+        finally:
+            connection.close()
+
+    def candidates(self, literal: bytes, files: Optional[Iterable[Path]] = None) -> Optional[list[Path]]:
+        """Files which may contain literal, None if index can't narrow search
+
+        Checks files (all files under root by default): indexed hits, plus files
+        added or changed since the last update, which the index knows nothing about.
+        """
+        trigrams = set(TRIGRAM.findall(literal.lower()))
+        if not trigrams:
+            return None
+        connection = self._connect()
+        try:
+            placeholders = ", ".join("?" * len(trigrams))
+            matched = {path for path, in connection.execute(
+                f"SELECT path FROM files WHERE id IN ("
+                f"SELECT file_id FROM postings WHERE trigram IN ({placeholders}) "
+                f"GROUP BY file_id HAVING COUNT(*) = ?)",
+                (*trigrams, len(trigrams)))}
+            known = {path: (mtime_ns, size) for path, mtime_ns, size
+                     in connection.execute("SELECT path, mtime_ns, size FROM files")}
+        finally:
+            connection.close()
+        result = []
+        for file_path in self._walk() if files is None else files:
+            if file_path == self.path:
+                continue
+            relative = str(file_path.relative_to(self.root))
+            if relative not in matched and relative in known:
+                try:
+                    info = file_path.stat()
+                except OSError:
+                    continue
+                if (info.st_mtime_ns, info.st_size) == known[relative]:
+                    continue
+            result.append(file_path)
+        return result
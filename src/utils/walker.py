@@ -0,0 +1,167 @@
+import os
+import re
+from fnmatch import fnmatch
+from typing import Callable, Iterable, Iterator, Optional
+
+
+def _glob_to_regex(pattern: str) -> re.Pattern:
+    """Translate gitignore glob to regex ('*' does not cross '/')"""
+    result = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            result.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            result.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            result.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            result.append('[^/]')
+            i += 1
+        elif pattern[i] == '[':
+            closing = pattern.find(']', i + 2)
+            if closing == -1:
+                result.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1:closing]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                result.append(f'[{body}]')
+                i = closing + 1
+        elif pattern[i] == '\\' and i + 1 < len(pattern):
+            result.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            result.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile(''.join(result) + r'\Z')
+
+
+class IgnoreRules:
+    """Rules of one .gitignore-style file"""
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        self.base = base
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\n\r')
+            if not line.strip() or line.startswith('#'):
+                continue
+            line = line.rstrip(' ')
+            negate = line.startswith('!')
+            if negate or line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            anchored = '/' in line
+            line = line.lstrip('/')
+            if line:
+                self.rules.append((_glob_to_regex(line), negate, dir_only, anchored))
+
+    @classmethod
+    def from_file(cls, base: str, file_path: str) -> 'IgnoreRules':
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+            return cls(base, file)
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included, None if no rule matched"""
+        relative = os.path.relpath(path, self.base).replace(os.sep, '/')
+        name = relative.rsplit('/', 1)[-1]
+        result = None
+        for regex, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative if anchored else name):
+                result = not negate
+        return result
+
+
+class TreeWalker:
+    """Walk directory tree with os.scandir, reusing DirEntry type information"""
+
+    def __init__(self, max_depth: Optional[int] = None, include: Iterable[str] = (),
+                 exclude: Iterable[str] = (), ignore_files: Iterable[str] = (),
+                 follow_symlinks: bool = False, yield_dirs: bool = False,
+                 onerror: Optional[Callable[[OSError], None]] = None):
+        self.max_depth = max_depth
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.ignore_files = list(ignore_files)
+        self.follow_symlinks = follow_symlinks
+        self.yield_dirs = yield_dirs
+        self.onerror = onerror
+
+    def walk(self, root) -> Iterator[os.DirEntry]:
+        """Yield entries under root; dirs are yielded only if yield_dirs"""
+        root = os.fspath(root)
+        visited = set()
+        if self.follow_symlinks:
+            try:
+                info = os.stat(root)
+                visited.add((info.st_dev, info.st_ino))
+            except OSError:
+                pass
+        yield from self._walk(root, root, 1, [], visited)
+
+    def _walk(self, root: str, path: str, depth: int, rules: list[IgnoreRules],
+              visited: set) -> Iterator[os.DirEntry]:
+        try:
+            with os.scandir(path) as iterator:
+                entries = list(iterator)
+        except OSError as e:
+            if self.onerror:
+                self.onerror(e)
+            return
+        if self.ignore_files:
+            names = {entry.name for entry in entries}
+            for ignore_name in self.ignore_files:
+                if ignore_name in names:
+                    try:
+                        rules = rules + [IgnoreRules.from_file(path, os.path.join(path, ignore_name))]
+                    except OSError as e:
+                        if self.onerror:
+                            self.onerror(e)
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=self.follow_symlinks)
+            except OSError:
+                is_dir = False
+            if self._skip(root, entry, is_dir, rules):
+                continue
+            if not is_dir:
+                yield entry
+                continue
+            if self.follow_symlinks:
+                try:
+                    info = entry.stat()
+                except OSError:
+                    continue
+                key = (info.st_dev, info.st_ino)
+                if key in visited:
+                    continue
+                visited.add(key)
+            if self.yield_dirs:
+                yield entry
+            if self.max_depth is None or depth < self.max_depth:
+                yield from self._walk(root, entry.path, depth + 1, rules, visited)
+
+    def _skip(self, root: str, entry: os.DirEntry, is_dir: bool, rules: list[IgnoreRules]) -> bool:
+        """Check globs and ignore rules"""
+        relative = os.path.relpath(entry.path, root).replace(os.sep, '/')
+        for pattern in self.exclude:
+            if fnmatch(entry.name, pattern) or fnmatch(relative, pattern):
+                return True
+        if not is_dir and self.include:
+            if not any(fnmatch(entry.name, pattern) or fnmatch(relative, pattern)
+                       for pattern in self.include):
+                return True
+        ignored = None
+        for rule in rules:
+            result = rule.match(entry.path, is_dir)
+            if result is not None:
+                ignored = result
+        return bool(ignored)
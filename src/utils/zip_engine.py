@@ -0,0 +1,322 @@
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import IO, Iterable, Optional
+from src.utils.walker import TreeWalker
+
+READ_CHUNK = 1 << 20
+SPILL_SIZE = 16 << 20
+LOCAL_HEADER_SIZE = 30
+DATA_DESCRIPTOR_FLAG = 0x08
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+STORED_SUFFIXES = frozenset({
+    '.gz', '.tgz', '.bz2', '.tbz2', '.xz', '.txz', '.lz4', '.zst', '.zip', '.jar', '.whl',
+    '.apk', '.7z', '.rar', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.avif',
+    '.mp3', '.aac', '.ogg', '.opus', '.flac', '.mp4', '.m4a', '.mkv', '.webm', '.avi', '.mov',
+    '.docx', '.xlsx', '.pptx', '.odt', '.epub',
+})
+
+
+def deflate_file(path: str, level: int, spill_dir: Optional[str] = None) -> tuple:
+    """Raw DEFLATE file like ZipFile.write, return (crc, size, compress_size, data or temp path)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    crc = size = compress_size = 0
+    chunks: list[bytes] = []
+    spill = None
+    try:
+        with open(path, 'rb') as file:
+            while True:
+                block = file.read(READ_CHUNK)
+                last = not block
+                if last:
+                    data = compressor.flush()
+                else:
+                    crc = zlib.crc32(block, crc)
+                    size += len(block)
+                    data = compressor.compress(block)
+                if data:
+                    compress_size += len(data)
+                    if spill is None and compress_size > SPILL_SIZE:
+                        spill = tempfile.NamedTemporaryFile(dir=spill_dir, prefix='.zip-', delete=False)
+                        spill.writelines(chunks)
+                        chunks = []
+                    if spill is None:
+                        chunks.append(data)
+                    else:
+                        spill.write(data)
+                if last:
+                    break
+    except BaseException:
+        if spill is not None:
+            spill.close()
+            os.unlink(spill.name)
+        raise
+    if spill is not None:
+        spill.close()
+        return crc, size, compress_size, spill.name
+    return crc, size, compress_size, b''.join(chunks)
+
+
+class _ZipInternals:
+    """The only place that touches private ZipFile state: fp, start_dir, _allowZip64, _didModify
+
+    zipfile has no public API for raw compressed member data. These attributes are
+    the same in every CPython 3 release since 3.6, they are checked here so that a
+    change fails loudly instead of writing a broken archive.
+    """
+
+    NAMES = ('fp', 'start_dir', '_allowZip64', '_didModify')
+
+    def __init__(self, zipf: zipfile.ZipFile):
+        if zipf.fp is None or not all(hasattr(zipf, name) for name in self.NAMES):
+            raise RuntimeError(f"zipfile of Python {sys.version.split()[0]}: raw member access is not supported")
+        self.zipf = zipf
+        self.fp: IO[bytes] = zipf.fp
+        self.allow_zip64: bool = zipf._allowZip64  # type: ignore[attr-defined]
+
+    def add_member(self, zinfo: zipfile.ZipInfo):
+        """Register member just written at end of archive, like ZipFile.write does"""
+        self.zipf.filelist.append(zinfo)
+        self.zipf.NameToInfo[zinfo.filename] = zinfo
+        self.zipf.start_dir = self.fp.tell()
+        self.zipf._didModify = True  # type: ignore[attr-defined]
+
+
+def write_raw(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, source):
+    """Append member with already compressed data (bytes or file object) to open archive"""
+    internals = _ZipInternals(zipf)
+    fp = internals.fp
+    zinfo.header_offset = fp.tell()
+    zip64 = internals.allow_zip64 and zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+    fp.write(zinfo.FileHeader(zip64))
+    if isinstance(source, bytes):
+        fp.write(source)
+    else:
+        remaining = zinfo.compress_size
+        while remaining:
+            block = source.read(min(READ_CHUNK, remaining))
+            if not block:
+                raise EOFError(f"{zinfo.filename}: truncated member data")
+            fp.write(block)
+            remaining -= len(block)
+    internals.add_member(zinfo)
+
+
+def seek_member_data(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo) -> IO[bytes]:
+    """Position archive file at compressed data of member, return file object"""
+    fp = _ZipInternals(zipf).fp
+    fp.seek(zinfo.header_offset)
+    header = fp.read(LOCAL_HEADER_SIZE)
+    if len(header) != LOCAL_HEADER_SIZE or header[:4] != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"{zinfo.filename}: bad local file header")
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    fp.seek(zinfo.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length)
+    return fp
+
+
+def file_crc(path) -> int:
+    """CRC-32 of file content"""
+    crc = 0
+    with open(path, 'rb') as file:
+        while block := file.read(READ_CHUNK):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+class ZipEngine:
+    """Write files to ZIP archive, DEFLATE runs in process pool, members keep input order"""
+
+    def __init__(self, jobs: int = 1, level: Optional[int] = None):
+        self.jobs = jobs
+        self.level = zlib.Z_DEFAULT_COMPRESSION if level is None else level
+        self.files = 0
+        self.bytes = 0
+        self.files_kept = 0
+        self.bytes_kept = 0
+
+    def is_stored(self, path: Path) -> bool:
+        """Level 0 and already compressed formats are stored as is"""
+        return self.level == 0 or path.suffix.lower() in STORED_SUFFIXES
+
+    def write_files(self, zipf: zipfile.ZipFile, items: Iterable[tuple[Path, str]],
+                    previous: Optional[zipfile.ZipFile] = None):
+        """Add (path, arcname) pairs to archive opened for writing
+
+        Members of previous archive with same size and mtime (or CRC) are copied raw.
+        """
+        spill_dir = None
+        if zipf.filename and os.path.isfile(zipf.filename):
+            spill_dir = os.path.dirname(os.path.abspath(zipf.filename))
+        executor = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        pending: deque[tuple] = deque()
+        try:
+            for path, arcname in items:
+                pending.append(self._prepare(path, arcname, previous, executor, spill_dir))
+                if len(pending) >= self.jobs * 4:
+                    self._collect(zipf, previous, pending.popleft())
+            while pending:
+                self._collect(zipf, previous, pending.popleft())
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def _prepare(self, path: Path, arcname: str, previous: Optional[zipfile.ZipFile],
+                 executor: Optional[ProcessPoolExecutor], spill_dir: Optional[str]) -> tuple:
+        """Decide how member is written, start compression"""
+        if self.is_stored(path) and previous is None:
+            return 'stored', path, arcname, None
+        zinfo = zipfile.ZipInfo.from_file(path, arcname)
+        if previous is not None:
+            old = self._unchanged(previous, path, zinfo)
+            if old is not None:
+                return 'raw', path, zinfo, old
+            if self.is_stored(path):
+                return 'stored', path, arcname, None
+        if executor is None:
+            return 'deflated', path, zinfo, deflate_file(str(path), self.level, spill_dir)
+        return 'deflated', path, zinfo, executor.submit(deflate_file, str(path), self.level, spill_dir)
+
+    @staticmethod
+    def _unchanged(previous: zipfile.ZipFile, path: Path, zinfo: zipfile.ZipInfo):
+        """Previous member if file has same size and mtime (DOS time, 2 s precision) or same CRC"""
+        old = previous.NameToInfo.get(zinfo.filename)
+        if old is None or old.is_dir() or old.file_size != zinfo.file_size:
+            return None
+        same_time = (old.date_time[:5] == zinfo.date_time[:5]
+                     and old.date_time[5] // 2 == zinfo.date_time[5] // 2)
+        if same_time or old.CRC == file_crc(path):
+            return old
+        return None
+
+    def _collect(self, zipf: zipfile.ZipFile, previous: Optional[zipfile.ZipFile], item: tuple):
+        """Write one member once its data is ready"""
+        kind, path, target, value = item
+        if kind == 'stored':
+            self._write_stored(zipf, path, target)
+        elif kind == 'raw':
+            assert previous is not None
+            self._write_copied(zipf, previous, target, value)
+        else:
+            self._write_deflated(zipf, target, value if isinstance(value, tuple) else value.result())
+
+    def _write_stored(self, zipf: zipfile.ZipFile, path: Path, arcname: str):
+        zipf.write(path, arcname, compress_type=zipfile.ZIP_STORED)
+        self.files += 1
+        self.bytes += zipf.filelist[-1].file_size
+
+    def _write_copied(self, zipf: zipfile.ZipFile, previous: zipfile.ZipFile, zinfo: zipfile.ZipInfo,
+                      old: zipfile.ZipInfo):
+        """Copy compressed data of previous member without recompressing"""
+        zinfo.compress_type = old.compress_type
+        zinfo.flag_bits = old.flag_bits & ~DATA_DESCRIPTOR_FLAG
+        zinfo.CRC = old.CRC
+        zinfo.compress_size = old.compress_size
+        write_raw(zipf, zinfo, seek_member_data(previous, old))
+        self.files_kept += 1
+        self.bytes_kept += zinfo.file_size
+
+    def _write_deflated(self, zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, result: tuple):
+        crc, size, compress_size, payload = result
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.CRC = crc
+        zinfo.file_size = size
+        zinfo.compress_size = compress_size
+        if isinstance(payload, bytes):
+            write_raw(zipf, zinfo, payload)
+        else:
+            try:
+                with open(payload, 'rb') as spill:
+                    write_raw(zipf, zinfo, spill)
+            finally:
+                os.unlink(payload)
+        self.files += 1
+        self.bytes += size
+
+
+def member_parts(name: str) -> tuple[str, ...]:
+    """Path parts of member name, ValueError if it points outside extraction dir"""
+    path = PurePosixPath(name.replace('\\', '/'))
+    parts = tuple(part for part in path.parts if part != '.')
+    if path.is_absolute() or '..' in parts or (parts and ':' in parts[0]):
+        raise ValueError(f"{name}: unsafe path in archive")
+    return parts
+
+
+class ZipExtractor:
+    """Extract ZIP archive on thread pool, every worker reads through its own archive handle"""
+
+    def __init__(self, archive_path: Path, jobs: int = 4):
+        self.archive_path = archive_path
+        self.jobs = jobs
+        self.files = 0
+        self.bytes = 0
+        self._local = threading.local()
+        self._handles: list[zipfile.ZipFile] = []
+        self._lock = threading.Lock()
+
+    def plan(self, zipf: zipfile.ZipFile) -> list[tuple[zipfile.ZipInfo, tuple[str, ...]]]:
+        """(member, path parts) for all members, checked before anything is written"""
+        members = []
+        for info in zipf.infolist():
+            parts = member_parts(info.filename)
+            if parts:
+                members.append((info, parts))
+        return members
+
+    @staticmethod
+    def existing(target: Path, members: list) -> set[str]:
+        """Relative paths already under target, one walk of subtrees the archive touches"""
+        names = set()
+        walker = TreeWalker(yield_dirs=True)
+        for top in {parts[0] for _, parts in members}:
+            top_path = target / top
+            if not top_path.exists():
+                continue
+            names.add(top)
+            if top_path.is_dir() and not top_path.is_symlink():
+                for entry in walker.walk(top_path):
+                    names.add(Path(entry.path).relative_to(target).as_posix())
+        return names
+
+    @staticmethod
+    def conflicts(members: list, existing: set[str]) -> list[str]:
+        """Members that overwrite existing files"""
+        return [info.filename for info, parts in members
+                if not info.is_dir() and '/'.join(parts) in existing]
+
+    def extract(self, target: Path, members: list):
+        """Create dirs, then decompress files concurrently"""
+        dirs: set[str] = set()
+        for info, parts in members:
+            depth = len(parts) if info.is_dir() else len(parts) - 1
+            dirs.update('/'.join(parts[:i]) for i in range(1, depth + 1))
+        for name in sorted(dirs):
+            (target / name).mkdir(exist_ok=True)
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                for size in executor.map(self._extract_file, (
+                        (info, target.joinpath(*parts)) for info, parts in members if not info.is_dir())):
+                    self.files += 1
+                    self.bytes += size
+        finally:
+            for handle in self._handles:
+                handle.close()
+
+    def _extract_file(self, item: tuple[zipfile.ZipInfo, Path]) -> int:
+        info, destination = item
+        zipf = getattr(self._local, 'zipf', None)
+        if zipf is None:
+            zipf = self._local.zipf = zipfile.ZipFile(self.archive_path)
+            with self._lock:
+                self._handles.append(zipf)
+        with zipf.open(info) as source, open(destination, 'wb') as output:
+            shutil.copyfileobj(source, output, READ_CHUNK)
+        return info.file_size
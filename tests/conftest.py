@@ -0,0 +1,31 @@
+import os
+import pytest
+# Imported before any pyfakefs Patcher starts: ProcessPoolExecutor (zip -j, grep -j)
+# sets up its pipes with the os functions bound at import time, which must be the real ones.
+import concurrent.futures.process  # noqa: F401
+from src.logging.logger import setup_logging, shutdown_logging
+
+
+@pytest.fixture(scope="session", autouse=True)
+def log_file(tmp_path_factory):
+    """Real log file for the whole run, opened before any pyfakefs Patcher starts"""
+    setup_logging(log_file=tmp_path_factory.mktemp("logging") / "shell.log")
+    yield
+    shutdown_logging()
+
+
+@pytest.fixture
+def pipe_path():
+    """Path of pipe filled with data and closed for writing, read like /dev/stdin"""
+    read_ends = []
+
+    def make(data: bytes) -> str:
+        read_end, write_end = os.pipe()
+        os.write(write_end, data)
+        os.close(write_end)
+        read_ends.append(read_end)
+        return f"/dev/fd/{read_end}"
+
+    yield make
+    for read_end in read_ends:
+        os.close(read_end)
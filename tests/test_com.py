@@ -3,6 +3,7 @@ from unittest.mock import patch
 import sys
 import os
 from pyfakefs.fake_filesystem_unittest import Patcher
+from src.logging.logger import setup_logging
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
@@ -25,7 +26,7 @@ class TestLsCommand:
             with patch('typer.echo') as mock_echo:
                 command.ls()
 
-                assert mock_echo.call_count >= 2
+                assert mock_echo.call_count >= 1
                 calls = [c[0][0] for c in mock_echo.call_args_list]
                 file_names = [str(call) for call in calls]
                 assert any("file1.txt" in name for name in file_names)
@@ -57,32 +58,76 @@ class TestLsCommand:
             command = LsCommand()
             with pytest.raises(FileNotFoundError):
                 command.ls("/nonexistent_path")
+
+    def test_ls_hidden_sort_and_recursive(self, tmp_path, capsys):
+        """Тест -a, сортировки по размеру и -R"""
+        (tmp_path / ".hidden").write_text("h")
+        (tmp_path / "small.txt").write_text("1")
+        (tmp_path / "big.txt").write_text("1" * 100)
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "inner.txt").write_text("")
+        from src.class_commands.ls_com import LsCommand
+        command = LsCommand()
+        command.ls(str(tmp_path))
+        assert capsys.readouterr().out == "big.txt\nsmall.txt\nsub/\n"
+        command.ls(str(tmp_path), all_files=True, sort="size")
+        names = capsys.readouterr().out.split()
+        assert names.index("big.txt") < names.index("small.txt")
+        assert ".hidden" in names
+        command.ls(str(tmp_path), recursive=True, sort="none")
+        out = capsys.readouterr().out
+        assert f"{tmp_path / 'sub'}:\ninner.txt\n" in out
+
+    @pytest.mark.parametrize("detailed", [False, True])
+    def test_ls_recursive_does_not_follow_symlinks(self, tmp_path, capsys, detailed):
+        """Тест -R не заходит в символическую ссылку на родительский каталог"""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "a" / "up").symlink_to("..")
+        from src.class_commands.ls_com import LsCommand
+        LsCommand().ls(str(tmp_path), recursive=True, detailed=detailed)
+        out = capsys.readouterr().out
+        assert f"{tmp_path / 'a'}:" in out
+        assert f"{tmp_path / 'a' / 'up'}:" not in out
+
+    def test_ls_detailed_thread_pool_keeps_order(self, tmp_path, capsys):
+        """Тест что ls -l -j выводит то же что и без пула потоков"""
+        for i in range(600):
+            (tmp_path / f"f{i:04}").write_text("x" * (i % 7))
+        from src.class_commands.ls_com import LsCommand
+        command = LsCommand()
+        command.ls(str(tmp_path), detailed=True, sort="none")
+        serial = capsys.readouterr().out
+        command.ls(str(tmp_path), detailed=True, sort="none", jobs=8)
+        assert capsys.readouterr().out == serial
+        assert serial.count("\n") == 600
 class TestCatCommand:
-    def test_cat_single_file(self):
+    def test_cat_single_file(self, capsysbinary):
         """Тест cat с одним файлом"""
         with Patcher() as patcher:
             fs = patcher.fs
             fs.create_file("/test.txt", contents="Content of file")
             from src.class_commands.cat_com import CatCommand
             command = CatCommand()
-            with patch('typer.echo') as mock_echo:
-                command.cat(["/test.txt"])
-                mock_echo.assert_called_once_with("Content of file")
-    def test_cat_multiple_files(self):
+            command.cat(["/test.txt"])
+            assert capsysbinary.readouterr().out == b"Content of file"
+    def test_cat_multiple_files(self, capsysbinary):
         """Тест cat с несколькими файлами"""
         with Patcher() as patcher:
             fs = patcher.fs
-            fs.create_file("/file1.txt", contents="Content 1")
-            fs.create_file("/file2.txt", contents="Content 2")
+            fs.create_file("/file1.txt", contents="Content 1\n")
+            fs.create_file("/file2.txt", contents="Content 2\n")
             from src.class_commands.cat_com import CatCommand
             command = CatCommand()
-            with patch('typer.echo') as mock_echo:
-                command.cat(["/file1.txt", "/file2.txt"])
-
-                assert mock_echo.call_count == 2
-                calls = [c[0][0] for c in mock_echo.call_args_list]
-                assert "Content 1" in calls
-                assert "Content 2" in calls
+            command.cat(["/file1.txt", "/file2.txt"])
+            assert capsysbinary.readouterr().out == b"Content 1\nContent 2\n"
+    def test_cat_binary_file_through_fd(self, tmp_path, capfdbinary):
+        """Тест потокового вывода двоичного файла через дескриптор stdout"""
+        data = bytes(range(256)) * 5000 + b"\xff\xfe not utf-8"
+        (tmp_path / "blob.bin").write_bytes(data)
+        (tmp_path / "text.txt").write_text("tail\n")
+        from src.class_commands.cat_com import CatCommand
+        CatCommand().cat([str(tmp_path / "blob.bin"), str(tmp_path / "text.txt")])
+        assert capfdbinary.readouterr().out == data + b"tail\n"
     def test_cat_nonexistent_file(self):
         """Тест cat с несуществующим файлом"""
         with Patcher():
@@ -90,6 +135,75 @@ class TestCatCommand:
             command = CatCommand()
             with pytest.raises(FileNotFoundError):
                 command.cat(["/nonexistent.txt"])
+    def test_cat_range(self, tmp_path, capfdbinary):
+        """Тест вывода диапазона байт"""
+        (tmp_path / "data.bin").write_bytes(bytes(range(256)) * 1000)
+        from src.class_commands.cat_com import CatCommand
+        command = CatCommand()
+        command.cat([str(tmp_path / "data.bin")], byte_range="1000:300")
+        assert capfdbinary.readouterr().out == (bytes(range(256)) * 1000)[1000:1300]
+        command.cat([str(tmp_path / "data.bin")], byte_range="255999:")
+        assert capfdbinary.readouterr().out == b"\xff"
+        with pytest.raises(ValueError):
+            command.cat([str(tmp_path / "data.bin")], byte_range="10")
+    def test_cat_pipe(self, pipe_path, capfdbinary):
+        """Тест cat и cat --range для канала (без seek)"""
+        from src.class_commands.cat_com import CatCommand
+        command = CatCommand()
+        command.cat([pipe_path(b"a\nb\n")])
+        assert capfdbinary.readouterr().out == b"a\nb\n"
+        command.cat([pipe_path(b"0123456789")], byte_range="2:3")
+        assert capfdbinary.readouterr().out == b"234"
+
+class TestHeadTailCommand:
+    def test_head_lines(self, tmp_path, capsysbinary):
+        """Тест head -n с чтением только начала файла"""
+        (tmp_path / "log.txt").write_bytes(b"".join(b"line %d\n" % i for i in range(100000)))
+        from src.class_commands.head_com import HeadCommand
+        HeadCommand().head([str(tmp_path / "log.txt")], lines=3)
+        assert capsysbinary.readouterr().out == b"line 0\nline 1\nline 2\n"
+        (tmp_path / "short.txt").write_bytes(b"one\ntwo")
+        HeadCommand().head([str(tmp_path / "short.txt")], lines=5)
+        assert capsysbinary.readouterr().out == b"one\ntwo"
+
+    def test_head_tail_pipe(self, pipe_path, capfdbinary):
+        """Тест head и tail для канала и файла с нулевым st_size (procfs)"""
+        from src.class_commands.head_com import HeadCommand
+        from src.class_commands.tail_com import TailCommand
+        data = b"".join(b"line %d\n" % i for i in range(5000))
+        HeadCommand().head([pipe_path(data)], lines=2)
+        assert capfdbinary.readouterr().out == b"line 0\nline 1\n"
+        TailCommand().tail([pipe_path(data)], lines=2)
+        assert capfdbinary.readouterr().out == b"line 4998\nline 4999\n"
+        if os.path.exists("/proc/self/status"):
+            TailCommand().tail(["/proc/self/status"], lines=1)
+            assert capfdbinary.readouterr().out.startswith(b"nonvoluntary_ctxt_switches")
+
+    def test_tail_lines_and_follow(self, tmp_path, capfdbinary):
+        """Тест tail -n с чтением блоков с конца и режима -f"""
+        log = tmp_path / "log.txt"
+        log.write_bytes(b"".join(b"line %d\n" % i for i in range(100000)))
+        from src.class_commands.tail_com import TailCommand
+        command = TailCommand()
+        command.tail([str(log)], lines=2)
+        assert capfdbinary.readouterr().out == b"line 99998\nline 99999\n"
+        (tmp_path / "partial.txt").write_bytes(b"a\nb\nno newline")
+        command.tail([str(tmp_path / "partial.txt")], lines=2)
+        assert capfdbinary.readouterr().out == b"b\nno newline"
+
+        polls = []
+
+        def append_once(_):
+            if polls:
+                raise KeyboardInterrupt
+            polls.append(1)
+            with open(log, "ab") as f:
+                f.write(b"appended\n")
+
+        with patch('src.class_commands.tail_com.time.sleep', side_effect=append_once):
+            command.tail([str(log)], lines=1, follow=True)
+        assert capfdbinary.readouterr().out == b"line 99999\nappended\n"
+
 class TestCpCommand:
     def test_cp_file_to_directory(self):
         """Тест копирования файла в директорию"""
@@ -101,7 +215,95 @@ class TestCpCommand:
             command = CpCommand()
             command.cp(["/file.txt"], "/target_dir/")
             assert fs.exists("/target_dir/file.txt")
+
+    def test_cp_recursive_parallel(self, tmp_path):
+        """Тест параллельного рекурсивного копирования с сохранением метаданных"""
+        source = tmp_path / "src"
+        (source / "a" / "b").mkdir(parents=True)
+        for i in range(30):
+            (source / "a" / f"f{i}.txt").write_text(f"data {i}" * i)
+        (source / "a" / "b" / "big.bin").write_bytes(os.urandom(3 << 20))
+        os.utime(source / "a" / "f5.txt", (1_000_000_000, 1_000_000_000))
+        from src.class_commands.cp_com import CpCommand
+        CpCommand().cp([str(source)], str(tmp_path / "dst"), recursive=True, jobs=4)
+        for path in source.rglob("*"):
+            copied = tmp_path / "dst" / path.relative_to(source)
+            assert copied.exists()
+            if path.is_file():
+                assert copied.read_bytes() == path.read_bytes()
+        assert (tmp_path / "dst" / "a" / "f5.txt").stat().st_mtime == 1_000_000_000
+
+    def test_cp_update_skips_unchanged(self, tmp_path, capsys):
+        """Тест инкрементального копирования --update"""
+        source = tmp_path / "src"
+        source.mkdir()
+        (source / "same.txt").write_text("same content")
+        (source / "changed.txt").write_text("old")
+        (tmp_path / "dst").mkdir()
+        from src.class_commands.cp_com import CpCommand
+        command = CpCommand()
+        command.cp([str(source)], str(tmp_path / "dst"), recursive=True, update=True)
+        assert "copied 2 files (15 bytes), skipped 0" in capsys.readouterr().out
+        (source / "changed.txt").write_text("new data")
+        (source / "new.txt").write_text("n")
+        command.cp([str(source)], str(tmp_path / "dst"), recursive=True, update=True)
+        out = capsys.readouterr().out
+        assert "copied 2 files (9 bytes), skipped 1 unchanged (12 bytes)" in out
+        assert (tmp_path / "dst" / "src" / "changed.txt").read_text() == "new data"
+        command.cp([str(source)], str(tmp_path / "dst"), recursive=True, checksum=True)
+        assert "copied 0 files (0 bytes), skipped 3 unchanged" in capsys.readouterr().out
+
+    def test_cp_sparse_file(self, tmp_path):
+        """Тест что копия разреженного файла остается разреженной"""
+        source = tmp_path / "disk.img"
+        with open(source, "wb") as f:
+            f.truncate(64 << 20)
+            f.seek(32 << 20)
+            f.write(b"data in the middle")
+        if source.stat().st_blocks * 512 >= source.stat().st_size:
+            pytest.skip("filesystem does not support sparse files")
+        from src.class_commands.cp_com import CpCommand
+        CpCommand().cp([str(source)], str(tmp_path / "copy.img"))
+        copied = tmp_path / "copy.img"
+        assert copied.stat().st_size == 64 << 20
+        assert copied.stat().st_blocks * 512 < 1 << 20
+        with open(copied, "rb") as f:
+            f.seek(32 << 20)
+            assert f.read(18) == b"data in the middle"
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+class TestMvCommand:
+    def test_mv_multiple_sources(self, tmp_path):
+        """Тест перемещения нескольких источников в каталог"""
+        (tmp_path / "a.txt").write_text("a")
+        (tmp_path / "dir").mkdir()
+        (tmp_path / "dir" / "b.txt").write_text("b")
+        (tmp_path / "target").mkdir()
+        from src.class_commands.mv_com import MvCommand
+        MvCommand().mv([str(tmp_path / "a.txt"), str(tmp_path / "dir")], str(tmp_path / "target"))
+        assert (tmp_path / "target" / "a.txt").read_text() == "a"
+        assert (tmp_path / "target" / "dir" / "b.txt").read_text() == "b"
+        assert not (tmp_path / "a.txt").exists()
+        assert not (tmp_path / "dir").exists()
+
+    def test_mv_cross_device(self, tmp_path):
+        """Тест перемещения между файловыми системами через промежуточное имя"""
+        import errno
+        source = tmp_path / "src"
+        (source / "sub").mkdir(parents=True)
+        for i in range(10):
+            (source / "sub" / f"f{i}").write_text(str(i))
+        (source / "link").symlink_to("sub")
+        (tmp_path / "target").mkdir()
+        from src.class_commands.mv_com import MvCommand
+        with patch('os.rename', side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            MvCommand().mv([str(source)], str(tmp_path / "target"), jobs=4)
+        moved = tmp_path / "target" / "src"
+        assert not source.exists()
+        assert (moved / "sub" / "f7").read_text() == "7"
+        assert (moved / "link").is_symlink()
+        assert [p.name for p in (tmp_path / "target").iterdir()] == ["src"]
+
+
 class TestRmCommand:
     def test_rm_directory_without_recursive(self):
         """Тест удаления директории без -r"""
@@ -162,6 +364,47 @@ class TestRmCommand:
                 assert not fs.exists("/project")
                 assert not fs.exists("/project/src/main.py")
 
+    def test_rm_trash_restore_and_purge(self, tmp_path, monkeypatch):
+        """Тест удаления в корзину, восстановления и очистки корзины"""
+        monkeypatch.setenv("HOME", str(tmp_path / "home"))
+        (tmp_path / "home").mkdir()
+        work = tmp_path / "work"
+        (work / "tree" / "a" / "b").mkdir(parents=True)
+        for i in range(20):
+            (work / "tree" / "a" / f"f{i}").write_text(str(i))
+        (work / "note.txt").write_text("note")
+        from src.class_commands.rm_com import RmCommand
+        command = RmCommand()
+        with patch('typer.echo'):
+            command.rm(str(work / "tree"), recursive=True, use_trash=True)
+            command.rm(str(work / "note.txt"), use_trash=True)
+            assert not (work / "tree").exists()
+            command.rm(str(work / "note.txt"), restore=True)
+            assert (work / "note.txt").read_text() == "note"
+            command.rm(str(work), purge=True)
+        trash_files = tmp_path / "home" / ".local" / "share" / "shell-trash" / "files"
+        assert list(trash_files.iterdir()) == []
+
+    def test_rm_force_bulk(self, tmp_path):
+        """Тест массового удаления rm -f из списка путей"""
+        (tmp_path / "tree" / "sub").mkdir(parents=True)
+        for i in range(30):
+            (tmp_path / "tree" / "sub" / f"f{i}").write_text("x" * i)
+        (tmp_path / "dir").mkdir()
+        (tmp_path / "one.txt").write_text("12345")
+        listing = tmp_path / "list"
+        listing.write_bytes(b"\0".join(os.fsencode(tmp_path / name) for name in ("tree", "missing", "dir")))
+        from src.class_commands.rm_com import RmCommand
+        with patch('typer.echo') as mock_echo:
+            RmCommand().rm([str(tmp_path / "one.txt")], recursive=False, force=True, from_file=str(listing))
+            assert not (tmp_path / "one.txt").exists()
+            assert (tmp_path / "dir").exists()
+            RmCommand().rm(None, recursive=True, force=True, from_file=str(listing))
+        assert not (tmp_path / "tree").exists()
+        assert not (tmp_path / "dir").exists()
+        mock_echo.assert_any_call("Removed 1 files (5 bytes)")
+        mock_echo.assert_any_call("Removed 30 files (435 bytes)")
+
 class TestZipCommand:
     def test_zip_create_archive(self):
         """Тест создания ZIP архива"""
@@ -201,3 +444,460 @@ class TestZipCommand:
                 command.unzip("/test.zip", "/extract_dir")
                 assert fs.exists("/extract_dir/file1.txt")
                 assert fs.exists("/extract_dir/file2.txt")
+
+    def test_zip_parallel_same_archive(self, tmp_path):
+        """Тест что zip -j создает тот же архив что и обычный режим"""
+        src = tmp_path / "src"
+        (src / "sub").mkdir(parents=True)
+        for i in range(25):
+            (src / "sub" / f"file{i}.txt").write_text(f"line {i}\n" * (i * 50))
+        (src / "photo.jpg").write_bytes(os.urandom(2048))
+        from src.class_commands.zip_com import ZipCommand
+        command = ZipCommand()
+        with patch('typer.echo'):
+            command.zip(str(src), str(tmp_path / "serial.zip"))
+            command.zip(str(src), str(tmp_path / "parallel.zip"), jobs=2)
+        assert (tmp_path / "serial.zip").read_bytes() == (tmp_path / "parallel.zip").read_bytes()
+        import zipfile
+        with zipfile.ZipFile(tmp_path / "parallel.zip") as zipf:
+            assert zipf.testzip() is None
+            assert len(zipf.namelist()) == 26
+            assert zipf.getinfo("photo.jpg").compress_type == zipfile.ZIP_STORED
+            assert zipf.read("sub/file3.txt") == b"line 3\n" * 150
+
+    def test_zip_update_copies_unchanged(self, tmp_path):
+        """Тест zip --update: неизмененные файлы копируются без пересжатия"""
+        src = tmp_path / "src"
+        src.mkdir()
+        for name in ("a.txt", "b.txt", "c.txt"):
+            (src / name).write_text(name * 1000)
+        archive = tmp_path / "out.zip"
+        from src.class_commands.zip_com import ZipCommand
+        from src.utils.zip_engine import deflate_file
+        command = ZipCommand()
+        with patch('typer.echo'):
+            command.zip(str(src), str(archive))
+        (src / "b.txt").write_text("changed" * 500)
+        (src / "c.txt").unlink()
+        (src / "d.txt").write_text("new")
+        with patch('typer.echo') as mock_echo, \
+                patch('src.utils.zip_engine.deflate_file', wraps=deflate_file) as mock_deflate:
+            command.zip(str(src), str(archive), update=True)
+        assert sorted(call.args[0] for call in mock_deflate.call_args_list) == [str(src / "b.txt"), str(src / "d.txt")]
+        mock_echo.assert_called_once_with(f"ZIP updated {archive}: added 2 files (3503 bytes), "
+                                          f"kept 1 unchanged (5000 bytes), removed 1")
+        import zipfile
+        with zipfile.ZipFile(archive) as zipf:
+            assert zipf.testzip() is None
+            assert sorted(zipf.namelist()) == ["a.txt", "b.txt", "d.txt"]
+            assert zipf.read("b.txt") == b"changed" * 500
+
+    def test_zip_update_odd_second_mtime(self, tmp_path):
+        """Тест zip --update: время с нечетной секундой совпадает с DOS-временем без подсчета CRC"""
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.txt").write_text("same")
+        os.utime(src / "a.txt", (1_700_000_001, 1_700_000_001))
+        archive = tmp_path / "out.zip"
+        from src.class_commands.zip_com import ZipCommand
+        command = ZipCommand()
+        with patch('typer.echo'):
+            command.zip(str(src), str(archive))
+        with patch('typer.echo'), patch('src.utils.zip_engine.file_crc') as mock_crc:
+            command.zip(str(src), str(archive), update=True)
+        mock_crc.assert_not_called()
+
+    def test_unzip_parallel_conflicts_and_traversal(self, tmp_path):
+        """Тест параллельной распаковки, подсчета конфликтов и защиты от выхода за каталог"""
+        import zipfile
+        archive = tmp_path / "data.zip"
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for i in range(50):
+                zipf.writestr(f"dir{i % 4}/file{i}.txt", f"content {i}" * 100)
+            zipf.writestr("empty/", "")
+        target = tmp_path / "out"
+        (target / "dir1").mkdir(parents=True)
+        (target / "dir1" / "file1.txt").write_text("old")
+        from src.class_commands.zip_com import ZipCommand
+        command = ZipCommand()
+        with patch('typer.confirm', return_value=True) as mock_confirm:
+            command.unzip(str(archive), str(target), jobs=4)
+        mock_confirm.assert_called_once_with("Overwrite 1?")
+        assert (target / "dir1" / "file1.txt").read_text() == "content 1" * 100
+        assert (target / "dir3" / "file47.txt").read_text() == "content 47" * 100
+        assert (target / "empty").is_dir()
+        evil = tmp_path / "evil.zip"
+        with zipfile.ZipFile(evil, 'w') as zipf:
+            zipf.writestr("ok.txt", "ok")
+            zipf.writestr("../escaped.txt", "bad")
+        with pytest.raises(OSError, match="unsafe path"):
+            command.unzip(str(evil), str(target))
+        assert not (tmp_path / "escaped.txt").exists()
+        assert not (target / "ok.txt").exists()
+
+    def test_zip_to_unseekable_stdout(self, tmp_path, monkeypatch):
+        """Тест потоковой записи ZIP в канал без перемотки"""
+        import io
+        import zipfile
+
+        class Pipe(io.RawIOBase):
+            def __init__(self):
+                self.data = bytearray()
+
+            def writable(self):
+                return True
+
+            def write(self, data):
+                self.data += data
+                return len(data)
+
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.txt").write_text("text " * 100)
+        (src / "b.png").write_bytes(os.urandom(500))
+        pipe = Pipe()
+        monkeypatch.setattr(sys, "stdout", io.TextIOWrapper(io.BufferedWriter(pipe)))
+        from src.class_commands.zip_com import ZipCommand
+        ZipCommand().zip(str(src), "-", jobs=2)
+        with zipfile.ZipFile(io.BytesIO(bytes(pipe.data))) as zipf:
+            assert zipf.testzip() is None
+            assert zipf.read("a.txt") == b"text " * 100
+            assert zipf.getinfo("b.png").flag_bits & 0x08
+        assert not (tmp_path / "-").exists()
+
+class TestGrepCommand:
+    def test_grep_parallel_same_output(self, tmp_path, capsys):
+        """Тест что grep -j выводит то же что и обычный поиск"""
+        for i in range(40):
+            sub = tmp_path / f"dir{i % 3}"
+            sub.mkdir(exist_ok=True)
+            (sub / f"file{i}.txt").write_text(f"line {i}\nneedle {i}\nother\nneedle again\n")
+        from src.class_commands.grep_com import GrepCommand
+        command = GrepCommand()
+        command.grep("needle", [str(tmp_path)], recursive=True, line_number=True)
+        serial = capsys.readouterr().out
+        command.grep("needle", [str(tmp_path)], recursive=True, line_number=True, jobs=2)
+        parallel = capsys.readouterr().out
+        assert serial.count("needle") == 80
+        assert parallel == serial
+
+    def test_grep_binary_file(self, tmp_path, capsys):
+        """Тест вывода для двоичного файла"""
+        (tmp_path / "data.bin").write_bytes(b"\x00\x01needle\x02\n")
+        from src.class_commands.grep_com import GrepCommand
+        command = GrepCommand()
+        command.grep("needle", [str(tmp_path / "data.bin")])
+        assert capsys.readouterr().out == f"Binary file {tmp_path / 'data.bin'} matches\n"
+        command.grep("needle", [str(tmp_path / "data.bin")], binary_files="without-match")
+        assert capsys.readouterr().out == ""
+
+    def test_grep_regex_with_literal(self, tmp_path, capsys):
+        """Тест поиска регулярного выражения с литеральной частью"""
+        (tmp_path / "log.txt").write_text("ok\nerror: disk 42\nERROR: net 7\nwarning\n")
+        from src.class_commands.grep_com import GrepCommand
+        command = GrepCommand()
+        command.grep(r"error: \w+ \d+", [str(tmp_path / "log.txt")], ignore_case=True, line_number=True)
+        out = capsys.readouterr().out
+        assert f"{tmp_path / 'log.txt'}:2:error: disk 42" in out
+        assert f"{tmp_path / 'log.txt'}:3:ERROR: net 7" in out
+        assert "warning" not in out
+
+    @pytest.mark.parametrize("pattern", [r"\x41bc", r"\101bc", r"\u0041bc", r"\U00000041bc",
+                                         r"\N{LATIN CAPITAL LETTER A}bc"])
+    def test_grep_escape_arguments_not_in_literal(self, tmp_path, capsys, pattern):
+        """Тест экранирований с аргументом (\\x, \\u, \\N, восьмеричные): аргумент не попадает в префильтр"""
+        (tmp_path / "abc.txt").write_text("Abc\n")
+        from src.utils.byte_search import required_literal
+        from src.class_commands.grep_com import GrepCommand
+        assert required_literal(pattern) == "bc"
+        GrepCommand().grep(pattern, [str(tmp_path / "abc.txt")])
+        assert capsys.readouterr().out == f"{tmp_path / 'abc.txt'}:Abc\n"
+
+    def test_grep_indexed(self, tmp_path, capsys):
+        """Тест поиска по триграммному индексу и его обновления"""
+        (tmp_path / "a.txt").write_text("alpha needle\n")
+        (tmp_path / "b.txt").write_text("beta\n")
+        from src.class_commands.grep_com import GrepCommand
+        from src.utils.trigram_index import TrigramIndex
+        command = GrepCommand()
+        command.build_index(str(tmp_path))
+        assert TrigramIndex(tmp_path).candidates(b"needle") == [tmp_path / "a.txt"]
+        (tmp_path / "c.txt").write_text("gamma needle\n")
+        command.build_index(str(tmp_path), refresh=True)
+        assert "3 files (1 updated, 0 removed)" in capsys.readouterr().out
+        command.grep("needle", [str(tmp_path)], recursive=True, indexed=True)
+        out = capsys.readouterr().out
+        assert "a.txt:alpha needle" in out
+        assert "c.txt:gamma needle" in out
+        assert "beta" not in out
+        (tmp_path / "new.txt").write_text("new needle\n")
+        command.grep("needle", [str(tmp_path)], recursive=True, indexed=True)
+        assert "new.txt:new needle" in capsys.readouterr().out
+        command.grep("a.txt", [str(tmp_path)], recursive=True)
+        assert ".grep_index.db" not in capsys.readouterr().out
+        command.grep("needle", [str(tmp_path)], recursive=True, indexed=True, include=["c.*"])
+        assert capsys.readouterr().out == f"{tmp_path / 'c.txt'}:gamma needle\n"
+
+class TestOutputBuffer:
+    def test_output_buffer_batches_writes(self):
+        """Тест что строки выводятся одной записью и без цвета вне терминала"""
+        from src.utils.output import OutputBuffer
+        with patch('typer.echo') as mock_echo:
+            with OutputBuffer() as out:
+                for i in range(100):
+                    out.line(out.style(f"line {i}", fg="red"))
+            assert mock_echo.call_count == 1
+            text = mock_echo.call_args[0][0]
+            assert text.count("\n") == 100
+            assert "\x1b[" not in text
+
+class TestTreeWalker:
+    def test_walker_globs_and_depth(self, tmp_path):
+        """Тест фильтров --include/--exclude и ограничения глубины"""
+        (tmp_path / "a.py").write_text("")
+        (tmp_path / "b.txt").write_text("")
+        (tmp_path / "build").mkdir()
+        (tmp_path / "build" / "c.py").write_text("")
+        (tmp_path / "src" / "deep").mkdir(parents=True)
+        (tmp_path / "src" / "d.py").write_text("")
+        (tmp_path / "src" / "deep" / "e.py").write_text("")
+        from src.utils.walker import TreeWalker
+        names = {e.name for e in TreeWalker(include=["*.py"], exclude=["build"]).walk(tmp_path)}
+        assert names == {"a.py", "d.py", "e.py"}
+        names = {e.name for e in TreeWalker(max_depth=2).walk(tmp_path) if e.is_file()}
+        assert names == {"a.py", "b.txt", "c.py", "d.py"}
+
+    def test_walker_gitignore_and_symlink_loop(self, tmp_path):
+        """Тест .gitignore правил и защиты от циклов символических ссылок"""
+        (tmp_path / ".gitignore").write_text("*.log\n/out/\n!keep.log\n")
+        (tmp_path / "app.log").write_text("")
+        (tmp_path / "keep.log").write_text("")
+        (tmp_path / "out").mkdir()
+        (tmp_path / "out" / "x.txt").write_text("")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "out").mkdir()
+        (tmp_path / "sub" / "out" / "y.txt").write_text("")
+        (tmp_path / "sub" / "loop").symlink_to(tmp_path)
+        from src.utils.walker import TreeWalker
+        walker = TreeWalker(ignore_files=[".gitignore"], follow_symlinks=True)
+        names = sorted(e.name for e in walker.walk(tmp_path))
+        assert names == [".gitignore", "keep.log", "y.txt"]
+
+class TestTarCommand:
+    def test_tar_sparse_member(self, tmp_path):
+        """Тест записи разреженного файла в формате GNU PAX sparse"""
+        folder = tmp_path / "vm"
+        folder.mkdir()
+        with open(folder / "disk.img", "wb") as f:
+            f.truncate(16 << 20)
+            f.write(b"boot")
+        if (folder / "disk.img").stat().st_blocks * 512 >= 16 << 20:
+            pytest.skip("filesystem does not support sparse files")
+        import tarfile
+        from src.class_commands.tar_com import TarCommand
+        TarCommand().tar(str(folder), str(tmp_path / "vm.tar.gz"))
+        with tarfile.open(tmp_path / "vm.tar.gz") as tar:
+            member = tar.getmember("vm/disk.img")
+            assert member.issparse()
+            assert member.size == 16 << 20
+            tar.extractall(tmp_path / "out")
+        extracted = tmp_path / "out" / "vm" / "disk.img"
+        assert extracted.stat().st_size == 16 << 20
+        assert extracted.stat().st_blocks * 512 < 1 << 20
+        assert extracted.read_bytes()[:4] == b"boot"
+
+    def test_tar_unreadable_dir(self, tmp_path):
+        """Тест: нечитаемая поддиректория прерывает архивацию, частичный архив удаляется"""
+        folder = tmp_path / "data"
+        (folder / "secret").mkdir(parents=True)
+        (folder / "a.txt").write_text("a")
+        real_scandir = os.scandir
+
+        def scandir(path):
+            if os.fspath(path).endswith("secret"):
+                raise PermissionError(13, "Permission denied", os.fspath(path))
+            return real_scandir(path)
+
+        from src.class_commands.tar_com import TarCommand
+        with patch('src.utils.walker.os.scandir', side_effect=scandir):
+            with pytest.raises(OSError, match="secret"):
+                TarCommand().tar(str(folder), str(tmp_path / "data.tar.gz"))
+        assert not (tmp_path / "data.tar.gz").exists()
+
+    def test_untar_stream_conflicts(self, tmp_path, monkeypatch):
+        """Тест потоковой распаковки с разрешением конфликтов по каждому файлу"""
+        folder = tmp_path / "proj"
+        (folder / "sub").mkdir(parents=True)
+        (folder / "a.txt").write_text("new a")
+        (folder / "sub" / "b.txt").write_text("new b")
+        from src.class_commands.tar_com import TarCommand
+        command = TarCommand()
+        command.tar(str(folder), str(tmp_path / "proj.tar.gz"))
+        out = tmp_path / "out"
+        (out / "proj" / "sub").mkdir(parents=True)
+        (out / "proj" / "a.txt").write_text("old a")
+        (out / "proj" / "sub" / "b.txt").write_text("old b")
+        with patch('typer.confirm', side_effect=lambda message: "a.txt" in message) as mock_confirm:
+            command.untar(str(tmp_path / "proj.tar.gz"), str(out))
+        assert mock_confirm.call_count == 2
+        assert (out / "proj" / "a.txt").read_text() == "new a"
+        assert (out / "proj" / "sub" / "b.txt").read_text() == "old b"
+        import io
+        with open(tmp_path / "proj.tar.gz", "rb") as f:
+            monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(f.read())))
+        command.untar("-", str(tmp_path / "piped"))
+        assert (tmp_path / "piped" / "proj" / "sub" / "b.txt").read_text() == "new b"
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO((tmp_path / "proj.tar.gz").read_bytes())))
+        with pytest.raises(OSError, match="File exists"):
+            command.untar("-", str(tmp_path / "piped"))
+
+    def test_tar_parallel_codecs(self, tmp_path):
+        """Тест блочного параллельного сжатия и выбора кодека"""
+        folder = tmp_path / "data"
+        folder.mkdir()
+        for i in range(6):
+            (folder / f"f{i}.txt").write_bytes(os.urandom(1 << 17).hex().encode())
+        import gzip
+        import tarfile
+        from src.class_commands.tar_com import TarCommand
+        command = TarCommand()
+        command.tar(str(folder), str(tmp_path / "serial.tar.gz"))
+        command.tar(str(folder), str(tmp_path / "parallel.tar.gz"), jobs=3)
+        assert (tmp_path / "serial.tar.gz").read_bytes() == (tmp_path / "parallel.tar.gz").read_bytes()
+        with gzip.open(tmp_path / "parallel.tar.gz") as f:
+            assert len(f.read()) > 1 << 20
+        for codec in ("none", "bz2", "xz"):
+            command.tar(str(folder), str(tmp_path / "out"), codec=codec, level=1, jobs=2)
+        for name in ("out.tar", "out.tar.bz2", "out.tar.xz", "parallel.tar.gz"):
+            with tarfile.open(tmp_path / name) as tar:
+                assert tar.extractfile("data/f3.txt").read() == (folder / "f3.txt").read_bytes()
+            command.untar(str(tmp_path / name), str(tmp_path / name.replace(".", "_")))
+            assert (tmp_path / name.replace(".", "_") / "data" / "f5.txt").read_bytes() == (folder / "f5.txt").read_bytes()
+        with pytest.raises(ValueError):
+            command.tar(str(folder), str(tmp_path / "bad"), codec="zstd")
+
+    def test_tar_index_member_and_list(self, tmp_path, capsys):
+        """Тест извлечения одного файла и списка по индексу смещений"""
+        folder = tmp_path / "backup"
+        (folder / "etc").mkdir(parents=True)
+        for i in range(8):
+            (folder / f"blob{i}.bin").write_bytes(os.urandom(200_000))
+        (folder / "etc" / "app.conf").write_text("port = 8080")
+        from src.class_commands.tar_com import TarCommand
+        from src.utils.tar_index import TarIndex
+        command = TarCommand()
+        command.tar(str(folder), str(tmp_path / "backup.tar.gz"), index=True)
+        created = sorted(TarIndex(tmp_path / "backup.tar.gz").names())
+        TarIndex(tmp_path / "backup.tar.gz").build()
+        assert sorted(TarIndex(tmp_path / "backup.tar.gz").names()) == created
+        command.list_members(str(tmp_path / "backup.tar.gz"))
+        listed = capsys.readouterr().out.splitlines()
+        assert "backup/etc/app.conf" in listed and len(listed) == 11
+        command.untar(str(tmp_path / "backup.tar.gz"), str(tmp_path / "out"), members=["backup/etc/app.conf"])
+        assert (tmp_path / "out" / "backup" / "etc" / "app.conf").read_text() == "port = 8080"
+        assert not (tmp_path / "out" / "backup" / "blob0.bin").exists()
+        command.tar(str(folder), str(tmp_path / "plain"), codec="xz", level=0)
+        command.untar(str(tmp_path / "plain.tar.xz"), str(tmp_path / "out2"), members=["backup/blob7.bin"])
+        assert (tmp_path / "out2" / "backup" / "blob7.bin").read_bytes() == (folder / "blob7.bin").read_bytes()
+        with pytest.raises(OSError, match="Not found in archive"):
+            command.untar(str(tmp_path / "plain.tar.xz"), str(tmp_path / "out2"), members=["missing"])
+
+    def test_tar_list_member_without_index(self, tmp_path, capsys):
+        """Тест --list и --member, когда индекс нельзя записать (каталог только для чтения)"""
+        folder = tmp_path / "backup"
+        (folder / "etc").mkdir(parents=True)
+        (folder / "etc" / "app.conf").write_text("port = 8080")
+        (folder / "big.bin").write_bytes(b"x" * 100_000)
+        import sqlite3
+        from src.class_commands.tar_com import TarCommand
+        command = TarCommand()
+        command.tar(str(folder), str(tmp_path / "backup.tar.gz"))
+        with patch('src.utils.tar_index.TarIndex.write',
+                   side_effect=sqlite3.OperationalError("unable to open database file")):
+            command.list_members(str(tmp_path / "backup.tar.gz"))
+            assert sorted(capsys.readouterr().out.splitlines()) == ["backup", "backup/big.bin", "backup/etc",
+                                                                    "backup/etc/app.conf"]
+            command.untar(str(tmp_path / "backup.tar.gz"), str(tmp_path / "out"), members=["backup/etc/"])
+            with pytest.raises(OSError, match="Not found in archive"):
+                command.untar(str(tmp_path / "backup.tar.gz"), str(tmp_path / "out"), members=["missing"])
+        assert (tmp_path / "out" / "backup" / "etc" / "app.conf").read_text() == "port = 8080"
+        assert not (tmp_path / "out" / "backup" / "big.bin").exists()
+        assert not (tmp_path / "backup.tar.gz.idx").exists()
+
+    def test_tar_to_stdout(self, tmp_path, capsysbinary):
+        """Тест записи TAR архива в stdout"""
+        folder = tmp_path / "data"
+        folder.mkdir()
+        (folder / "a.txt").write_text("streamed")
+        import io
+        import tarfile
+        from src.class_commands.tar_com import TarCommand
+        TarCommand().tar(str(folder), "-", codec="bz2")
+        with tarfile.open(fileobj=io.BytesIO(capsysbinary.readouterr().out)) as tar:
+            assert tar.extractfile("data/a.txt").read() == b"streamed"
+
+
+class TestLogging:
+    def test_json_log_with_counters_and_rotation(self, tmp_path):
+        """Тест структурированного лога: поля команды, счетчики и ротация файла"""
+        import json
+        from src.logging.logger import shutdown_logging
+        from src.class_commands.cp_com import CpCommand
+        (tmp_path / "a.txt").write_text("12345")
+        shutdown_logging()
+        log_file = tmp_path / "shell.log"
+        try:
+            setup_logging(log_file=str(log_file), json_format=True, max_bytes=300, backup_count=1)
+            for i in range(3):
+                CpCommand().cp([str(tmp_path / "a.txt")], str(tmp_path / f"b{i}.txt"))
+            with pytest.raises(FileNotFoundError):
+                CpCommand().cp([str(tmp_path / "missing.txt")], str(tmp_path / "c.txt"))
+            shutdown_logging()
+            entries = [json.loads(line) for path in (tmp_path / "shell.log.1", log_file)
+                       for line in path.read_text().splitlines()]
+            assert entries[-2]["status"] == "ok" and entries[-2]["files"] == 1 and entries[-2]["bytes"] == 5
+            assert entries[-1]["status"] == "error" and "missing.txt" in entries[-1]["error"]
+            assert all(entry["duration_ms"] >= 0 for entry in entries)
+            assert log_file.stat().st_size <= 300
+        finally:
+            shutdown_logging()
+            setup_logging(log_file=str(tmp_path / "after.log"))
+
+    def test_stats_and_profile_report(self, tmp_path, capsys):
+        """Тест --stats и --profile: время, память, счетчики команды и горячие функции"""
+        from src.logging.logger import set_instrumentation
+        from src.class_commands.cp_com import CpCommand
+        (tmp_path / "a.txt").write_text("x" * 1000)
+        set_instrumentation(stats=True, profile=True)
+        try:
+            CpCommand().cp([str(tmp_path / "a.txt")], str(tmp_path / "b.txt"))
+        finally:
+            set_instrumentation()
+        err = capsys.readouterr().err
+        assert "wall time:" in err and "cpu time:" in err and "peak rss:" in err
+        assert "files: 1\n" in err and "bytes: 1000\n" in err and "throughput:" in err
+        assert "Ordered by: cumulative time" in err and "cp_com.py" in err
+        CpCommand().cp([str(tmp_path / "a.txt")], str(tmp_path / "c.txt"))
+        assert capsys.readouterr().err == ""
+
+
+class TestStartup:
+    HEAVY_MODULES = ("tarfile", "zipfile", "sqlite3", "hashlib", "src.class_commands.tar_com",
+                     "src.class_commands.zip_com", "src.class_commands.grep_com", "src.class_commands.cp_com")
+
+    def test_command_imports_only_its_module(self, tmp_path):
+        """Тест запуска (-X importtime): ls не загружает модули других команд и tarfile/zipfile"""
+        import subprocess
+        (tmp_path / "dir").mkdir()
+        (tmp_path / "dir" / "listed.txt").write_text("")
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "src.main", "ls", str(tmp_path / "dir")],
+            cwd=os.path.join(os.path.dirname(__file__), ".."), capture_output=True, text=True,
+            env={**os.environ, "SHELL_LOG_FILE": str(tmp_path / "shell.log")},
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == "listed.txt\n"
+        imports = {line.split("|")[-1].strip() for line in result.stderr.splitlines()
+                   if line.startswith("import time:") and not line.endswith("| imported package")}
+        assert "src.commands" in imports and "src.utils.output" in imports
+        assert [module for module in self.HEAVY_MODULES if module in imports] == []